@@ -0,0 +1,141 @@
+"""
+วัดขนาดไฟล์ DB และเวลา query ร้อนบนประวัติเกมจำลองหลายล้านเกม
+เทียบ schema เวอร์ชัน 3 (เกมที่จบค้างใน active_games) กับหลัง migrate + compaction
+และหลังลบ archive ตาม retention
+
+    python benchmarks/bench_archive.py 1000000 3000000
+"""
+import asyncio
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+from db.archive import ArchiveCompactor
+
+ACTIVE_GAMES = 500
+REPEAT = 200
+
+def build_history(path, finished_games):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    for _, statements in database.MIGRATIONS[:3]:
+        for sql in statements:
+            conn.execute(sql)
+    conn.execute("PRAGMA user_version = 3")
+
+    start = datetime.datetime(2024, 1, 1)
+    conn.executemany("""
+        INSERT INTO active_games (player_x_id, player_o_id, turn, board_state, status, start_time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (i * 2, i * 2 + 1, 'O', 'XOO-X---X', 'finished', (start + datetime.timedelta(seconds=i)).isoformat())
+        for i in range(finished_games)
+    ))
+
+    now = datetime.datetime.utcnow()
+    conn.executemany("""
+        INSERT INTO active_games (player_x_id, player_o_id, turn, board_state, status, start_time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (10**12 + i * 2, 10**12 + i * 2 + 1, 'X', '---------', 'active', (now - datetime.timedelta(seconds=i)).isoformat())
+        for i in range(ACTIVE_GAMES)
+    ))
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+def file_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+async def time_query(name, coro_factory):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        await coro_factory()
+    return name, (time.perf_counter() - started) / REPEAT * 1e6
+
+async def run_queries():
+    # โหลดสถานะเกม (คอลัมน์ที่มีทั้งก่อนและหลัง v4)
+    state_probe = "SELECT board_state, turn FROM active_games WHERE game_id = ?"
+    return [
+        await time_query("is_in_game (miss)", lambda: database.is_in_game(42)),
+        await time_query("is_in_game (hit)", lambda: database.is_in_game(10**12)),
+        await time_query("get_game_state", lambda: database._fetchone(state_probe, (1,))),
+        await time_query("get_active_game_players", database.get_active_game_players),
+        await time_query("get_all_active_games", database.get_all_active_games),
+    ]
+
+async def checkpoint():
+    db = await database._get_writer()
+    async with database._write_lock:
+        await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+async def vacuum_all(pages=100_000):
+    db = await database._get_writer()
+    while True:
+        async with db.execute("PRAGMA freelist_count") as cursor:
+            (free,) = await cursor.fetchone()
+        if not free:
+            return
+        await database.incremental_vacuum(pages)
+
+async def bench(finished_games):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = database.DB_PATH = os.path.join(tmp, "games.db")
+        build_history(path, finished_games)
+
+        # ก่อน: หยุดไว้ที่เวอร์ชัน 3 (ยังไม่มี archive)
+        database.MIGRATIONS, saved = database.MIGRATIONS[:3], database.MIGRATIONS
+        await database.setup_db()
+        size_before = file_size(path)
+        before = await run_queries()
+        await database.close_db()
+        database.MIGRATIONS = saved
+
+        started = time.perf_counter()
+        await database.setup_db()
+        migrate_seconds = time.perf_counter() - started
+
+        compactor = ArchiveCompactor(batch_size=20_000, vacuum_pages=100_000)
+        started = time.perf_counter()
+        archived, _ = await compactor.compact()
+        await vacuum_all()
+        await checkpoint()
+        compact_seconds = time.perf_counter() - started
+        size_archived = file_size(path)
+        after = await run_queries()
+
+        assert await database.get_archived_game(1) is not None
+
+        compactor.retention = datetime.timedelta(days=30)
+        started = time.perf_counter()
+        _, purged = await compactor.compact()
+        await vacuum_all()
+        await checkpoint()
+        purge_seconds = time.perf_counter() - started
+        size_purged = file_size(path)
+        await database.close_db()
+
+    mb = 1024 * 1024
+    print(f"\n== {finished_games:,} finished games (+{ACTIVE_GAMES} active) ==")
+    print(f"migrate v3 -> v{database.SCHEMA_VERSION} (incl. VACUUM): {migrate_seconds:.2f}s")
+    print(f"compaction: archived {archived:,} games in {compact_seconds:.2f}s")
+    print(f"retention: purged {purged:,} games in {purge_seconds:.2f}s")
+    print(f"{'db size':<24}{size_before / mb:>10.1f} MB -> {size_archived / mb:.1f} MB (archived) -> {size_purged / mb:.1f} MB (purged)")
+    print(f"{'query':<24}{'before (µs)':>14}{'after (µs)':>14}")
+    for (name, b), (_, a) in zip(before, after):
+        print(f"{name:<24}{b:>14.1f}{a:>14.1f}")
+
+async def main(sizes):
+    for size in sizes:
+        await bench(size)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 3_000_000]
+    asyncio.run(main(sizes))
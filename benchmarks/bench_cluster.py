@@ -0,0 +1,97 @@
+"""
+ทดสอบคิวกลางของโหมด cluster: เปิด coordinator แล้วให้ worker หลาย process ยิง join พร้อมกัน
+ตรวจว่าไม่มีใครถูกจับคู่ซ้ำข้าม process และวัด join/วินาที ตามจำนวน worker
+
+ตัวเลข join/วินาที ไม่ได้เพิ่มตามจำนวน worker และไม่ควรคาดหวังว่าจะเพิ่ม: ทุก join ต้องผ่าน coordinator ตัวเดียว
+(worker ยิ่งมากยิ่งมีรอบส่งข้อความข้าม process) ใช้วัดว่าคิวกลางไม่เป็นคอขวดและไม่จับคู่ซ้ำ ไม่ใช่วัดการ scale
+
+    python benchmarks/bench_cluster.py 4000 1 2 4
+"""
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+from game.cluster import ClusterCoordinator, ClusterLink, RemoteMatchmaker
+from game.matchmaking import Matchmaker, Ticket
+
+PORT = 18765
+GUILDS = 20
+
+def worker(cluster_id, user_ids, results):
+    async def run():
+        link = ClusterLink(cluster_id, [cluster_id], port=PORT)
+        await link.connect()
+        matchmaker = RemoteMatchmaker(link)
+        rng = random.Random(cluster_id)
+        pairs = []
+
+        async def join(user_id):
+            if await matchmaker.check_busy(user_id):
+                return
+            guild_id = user_id % GUILDS
+            opponent = await matchmaker.join(Ticket(user_id, f"user{user_id}", guild_id, guild_id, rng.randint(800, 1200)))
+            if opponent is not None:
+                pairs.append((user_id, opponent.user_id))
+                matchmaker.release(user_id, opponent.user_id)
+
+        await asyncio.gather(*(join(user_id) for user_id in user_ids))
+        await link.close()
+        results.put(pairs)
+    asyncio.run(run())
+
+async def bench(players, workers):
+    coordinator = ClusterCoordinator(
+        Matchmaker(widen_every=timedelta(milliseconds=5), cross_guild_after=timedelta(milliseconds=20)),
+        port=PORT
+    )
+    await coordinator.start()
+
+    # ผู้เล่นคนเดียวกันอาจกด /xomatch จากหลาย guild ที่อยู่คนละ worker
+    rng = random.Random(workers)
+    requests = list(range(1, players + 1)) + rng.sample(range(1, players + 1), players // 4)
+    rng.shuffle(requests)
+    chunks = [requests[i::workers] for i in range(workers)]
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(i, chunk, results)) for i, chunk in enumerate(chunks)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    pairs = []
+    for _ in processes:
+        pairs.extend(await asyncio.to_thread(results.get))
+    seconds = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    await coordinator.close()
+
+    paired = [user_id for pair in pairs for user_id in pair]
+    assert all(a != b for a, b in pairs), "จับคู่กับตัวเอง"
+    assert len(paired) == len(set(paired)), "มีผู้เล่นถูกจับคู่มากกว่าหนึ่งครั้ง"
+    assert not set(paired) & set(coordinator.matchmaker._tickets), "ผู้เล่นที่จับคู่แล้วยังค้างในคิว"
+    print(f"{workers} workers: {len(requests):,} joins in {seconds:.2f}s "
+          f"({len(requests) / seconds:,.0f}/s incl. process start, single coordinator), {len(pairs):,} pairs, no double pairings ✅")
+
+async def main(players, worker_counts):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "games.db")
+        await database.setup_db()
+        try:
+            for workers in worker_counts:
+                await bench(players, workers)
+        finally:
+            await database.close_db()
+
+if __name__ == "__main__":
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4]
+    asyncio.run(main(players, worker_counts))
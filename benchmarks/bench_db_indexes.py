@@ -0,0 +1,112 @@
+"""
+วัดเวลา query ร้อนของ db/database.py บนประวัติเกมจำลองขนาดต่างๆ
+เทียบ schema เดิม (เวอร์ชัน 1 ไม่มี index) กับหลัง migrate
+
+    python benchmarks/bench_db_indexes.py 10000 100000 1000000
+"""
+import asyncio
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+
+ACTIVE_GAMES = 500
+QUEUE_SIZE = 200
+REPEAT = 200
+
+def build_history(path, finished_games):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    for sql in database.MIGRATIONS[0][1]:
+        conn.execute(sql)
+    conn.execute("PRAGMA user_version = 1")
+
+    start = datetime.datetime(2024, 1, 1)
+    rows = (
+        (i * 2, i * 2 + 1, 'X', 'XOXOXOXOX', 'finished', (start + datetime.timedelta(seconds=i)).isoformat())
+        for i in range(finished_games)
+    )
+    conn.executemany("""
+        INSERT INTO active_games (player_x_id, player_o_id, turn, board_state, status, start_time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+
+    now = datetime.datetime.utcnow()
+    conn.executemany("""
+        INSERT INTO active_games (player_x_id, player_o_id, turn, board_state, status, start_time)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (10**12 + i * 2, 10**12 + i * 2 + 1, 'X', '---------', 'active', (now - datetime.timedelta(seconds=i)).isoformat())
+        for i in range(ACTIVE_GAMES)
+    ))
+    conn.executemany("""
+        INSERT INTO matchmaking_queue (user_id, username, guild_id, channel_id, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        (10**13 + i, f"user{i}", 1, 1, (now - datetime.timedelta(seconds=i)).isoformat())
+        for i in range(QUEUE_SIZE)
+    ))
+    conn.commit()
+    conn.close()
+
+async def time_query(name, coro_factory):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        await coro_factory()
+    return name, (time.perf_counter() - started) / REPEAT * 1e6
+
+async def run_queries():
+    # หัวคิวเรียงตามเวลาเข้า (SELECT เดิมของ find_match ก่อนย้ายคิวไปไว้ในหน่วยความจำ)
+    queue_probe = """
+        SELECT user_id, username FROM matchmaking_queue
+        WHERE user_id != ?
+        ORDER BY timestamp ASC
+        LIMIT 1
+    """
+    return [
+        await time_query("is_in_game (miss)", lambda: database.is_in_game(42)),
+        await time_query("is_in_game (hit)", lambda: database.is_in_game(10**12)),
+        await time_query("get_active_game_players", database.get_active_game_players),
+        await time_query("get_all_active_games", database.get_all_active_games),
+        await time_query("queue head (select)", lambda: database._fetchone(queue_probe, (0,))),
+    ]
+
+async def bench(finished_games):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "games.db")
+        build_history(database.DB_PATH, finished_games)
+
+        # ก่อน migrate: เปิด pool โดยหยุดไว้ที่เวอร์ชัน 1
+        original = database.SCHEMA_VERSION
+        database.MIGRATIONS, saved = database.MIGRATIONS[:1], database.MIGRATIONS
+        await database.setup_db()
+        before = await run_queries()
+        await database.close_db()
+        database.MIGRATIONS = saved
+
+        started = time.perf_counter()
+        await database.setup_db()
+        migrate_seconds = time.perf_counter() - started
+        after = await run_queries()
+        await database.close_db()
+
+    print(f"\n== {finished_games:,} finished games (+{ACTIVE_GAMES} active, {QUEUE_SIZE} queued) ==")
+    print(f"migrate v1 -> v{original}: {migrate_seconds:.2f}s")
+    print(f"{'query':<24}{'before (µs)':>14}{'after (µs)':>14}")
+    for (name, b), (_, a) in zip(before, after):
+        print(f"{name:<24}{b:>14.1f}{a:>14.1f}")
+
+async def main(sizes):
+    for size in sizes:
+        await bench(size)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    asyncio.run(main(sizes))
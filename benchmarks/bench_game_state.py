@@ -0,0 +1,112 @@
+"""
+เทียบความเร็วตรวจผลกระดาน: check_winner เดิม (ลิสต์แนวชนะ + เทียบตัวอักษร)
+กับตารางสำเร็จรูป 3x3 และ BitBoard.play แบบ incremental
+
+    python benchmarks/bench_game_state.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.game_state import BitBoard, check_winner
+
+NUMBER = 200_000
+
+# check_winner ก่อนเปลี่ยนเป็น bitboard ใช้เป็น baseline
+def legacy_check_winner(board: str):
+    win_conditions = [
+        [0, 1, 2], [3, 4, 5], [6, 7, 8],
+        [0, 3, 6], [1, 4, 7], [2, 5, 8],
+        [0, 4, 8], [2, 4, 6]
+    ]
+    for condition in win_conditions:
+        a, b, c = condition
+        if board[a] != '-' and board[a] == board[b] == board[c]:
+            return board[a]
+    if '-' not in board:
+        return 'draw'
+    return None
+
+def random_positions(count, seed=1):
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        board = ['-'] * 9
+        mark = 'X'
+        for idx in rng.sample(range(9), rng.randint(0, 9)):
+            board[idx] = mark
+            mark = 'O' if mark == 'X' else 'X'
+            if legacy_check_winner(''.join(board)):
+                break
+        positions.append(''.join(board))
+    return positions
+
+def random_game(size, rng):
+    moves = list(range(size * size))
+    rng.shuffle(moves)
+    return moves
+
+def bench_check(name, func, positions):
+    per_call = timeit.timeit(
+        "for p in positions: func(p)",
+        globals={"positions": positions, "func": func},
+        number=NUMBER // len(positions),
+    ) / NUMBER
+    print(f"{name:<36}{per_call * 1e9:>10.0f} ns/call")
+
+def bench_game(name, size, games=5_000):
+    rng = random.Random(2)
+    sequences = [random_game(size, rng) for _ in range(games)]
+
+    def play_all():
+        moves = 0
+        for sequence in sequences:
+            board = BitBoard(size)
+            mark = 'X'
+            for idx in sequence:
+                moves += 1
+                if board.play(idx, mark):
+                    break
+                mark = 'O' if mark == 'X' else 'X'
+        return moves
+
+    moves = play_all()
+    seconds = timeit.timeit(play_all, number=3) / 3
+    print(f"{name:<36}{seconds / moves * 1e9:>10.0f} ns/move")
+
+def bench_legacy_game(games=5_000):
+    rng = random.Random(2)
+    sequences = [random_game(3, rng) for _ in range(games)]
+
+    def play_all():
+        moves = 0
+        for sequence in sequences:
+            board = ['-'] * 9
+            mark = 'X'
+            for idx in sequence:
+                moves += 1
+                board[idx] = mark
+                if legacy_check_winner(''.join(board)):
+                    break
+                mark = 'O' if mark == 'X' else 'X'
+        return moves
+
+    moves = play_all()
+    seconds = timeit.timeit(play_all, number=3) / 3
+    print(f"{'legacy list + join (3x3)':<36}{seconds / moves * 1e9:>10.0f} ns/move")
+
+if __name__ == "__main__":
+    positions = random_positions(1_000)
+    assert all(legacy_check_winner(p) == check_winner(p) for p in positions)
+
+    print("== ตรวจผลจากสตริงกระดาน ==")
+    bench_check("legacy check_winner", legacy_check_winner, positions)
+    bench_check("check_winner (3^9 lookup)", check_winner, positions)
+
+    print("\n== เล่นทั้งเกม (วาง + ตรวจผลทุกตา) ==")
+    bench_legacy_game()
+    bench_game("BitBoard.play (3x3 table)", 3)
+    bench_game("BitBoard.play (5x5, 4-in-a-row)", 5)
@@ -0,0 +1,78 @@
+"""
+วัดเวลา /leaderboard และ /profile บนผู้เล่นจำลองหลายขนาด
+(หน้าแรก / หน้าลึก แบบไม่ cache, อันดับของผู้เล่นหนึ่งคน, อัปเดตคะแนนหลังจบเกม)
+
+    python benchmarks/bench_leaderboard.py 10000 100000 1000000
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+from game.ratings import Leaderboard
+
+REPEAT = 200
+
+def build_players(path, players, seed=3):
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    for _, statements in database.MIGRATIONS:
+        for sql in statements:
+            conn.execute(sql)
+    conn.execute(f"PRAGMA user_version = {database.SCHEMA_VERSION}")
+    conn.executemany("""
+        INSERT INTO player_ratings (user_id, rating, wins, losses, draws, updated_at)
+        VALUES (?, ?, 0, 0, 0, '2024-01-01')
+    """, ((user_id, int(rng.gauss(1000, 150))) for user_id in range(1, players + 1)))
+    conn.commit()
+    conn.close()
+
+async def time_call(name, coro_factory):
+    started = time.perf_counter()
+    for i in range(REPEAT):
+        await coro_factory(i)
+    return name, (time.perf_counter() - started) / REPEAT * 1e6
+
+async def bench(players):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "games.db")
+        build_players(database.DB_PATH, players)
+        await database.setup_db()
+
+        board = Leaderboard(cached_pages=0)
+        started = time.perf_counter()
+        await board.page(1)
+        load_seconds = time.perf_counter() - started
+
+        deep = players // board.page_size // 2
+        results = [
+            await time_call("page 1 (uncached)", lambda i: board.page(1)),
+            await time_call(f"page {deep:,} (uncached)", lambda i: board.page(deep)),
+            await time_call("profile (rank)", lambda i: board.profile(i + 1)),
+            await time_call("record_result", lambda i: board.record_result(2 * i + 1, 2 * i + 2, 'X')),
+        ]
+        cached = Leaderboard()
+        await cached.page(1)
+        results.append(await time_call("page 1 (cached)", lambda i: cached.page(1)))
+        await database.close_db()
+
+    print(f"\n== {players:,} rated players ==")
+    print(f"rank tree load: {load_seconds:.2f}s")
+    for name, micros in results:
+        print(f"{name:<28}{micros:>10.1f} µs")
+
+async def main(sizes):
+    for size in sizes:
+        await bench(size)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    asyncio.run(main(sizes))
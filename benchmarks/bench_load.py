@@ -0,0 +1,416 @@
+"""
+จำลองโหลดทั้งระบบ: ผู้เล่นหลายพันคนกด /xomatch แล้วเล่นจนจบผ่าน XO cog, XOGameView และ TimeoutChecker ตัวจริง
+โดยใช้ Interaction / User / Message ปลอมที่หน่วงเวลาเหมือน REST ของ Discord (--rest-ms)
+เกมส่วนหนึ่งถูกทิ้งกลางคัน (--abandon) ให้ TimeoutChecker ปิดเมื่อหมดเวลา (--timeout)
+และ --watched เกมแรกมีผู้ชม /xowatch เกมละ --spectators ห้อง
+
+รายงาน moves/วินาที, p50/p99 ของการกดปุ่ม, สัดส่วนเวลารอ DB เทียบกับ REST และหน่วยความจำต่อเกม
+แล้วเทียบ metric ใน TRACKED กับ baseline ใน benchmarks/baselines/bench_load.json (--save เพื่อบันทึก baseline ของ config นี้ใหม่)
+ผลแย่ลงเกิน --tolerance จะ exit 1
+
+    python benchmarks/bench_load.py                                 # กดรัว (วัดเพดาน)
+    python benchmarks/bench_load.py --think-ms 1000 --timeout 30    # ผู้เล่นคิดตาละ ~1 วินาที
+    python benchmarks/bench_load.py --spectators 300                # เกมดังที่มีผู้ชมหลายร้อยห้อง
+    python benchmarks/bench_load.py --save                          # บันทึก baseline ใหม่
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+import game.matchmaking as matchmaking
+from nextcord import InteractionType
+from db.journal import move_journal
+from game.registry import live_games
+from game.scheduler import game_timeouts
+from game.views import button_custom_id
+from metrics import DB_LATENCY, TIMEOUT_SWEEP, REST_EDIT
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "bench_load.json")
+GUILDS = 20
+BOT_USER_ID = 1
+# ช่อง DM ของผู้เล่นแต่ละคนมี id คงที่
+DM_CHANNEL_OFFSET = 10 ** 9
+
+# ชื่อ metric → True ถ้ายิ่งมากยิ่งดี
+# db_share / db_ms_per_move (เวลารอ DB เทียบกับเวลารอ REST) แสดงไว้ดูเท่านั้น ไม่ใช้ตัดสิน:
+# แกว่งหลายสิบเปอร์เซ็นต์ระหว่างรอบบนโค้ดเดิม เพราะขึ้นกับจังหวะที่ event loop ว่าง
+TRACKED = {
+    "moves_per_sec": True,
+    "move_p50_ms": False,
+    "move_p99_ms": False,
+    "kb_per_game": False,
+}
+
+class FakeDiscord:
+    """
+    ทุก REST call ของ object ปลอมผ่านที่นี่: หน่วง latency ± 50% แล้วนับจำนวนและเวลารวม
+    """
+
+    def __init__(self, latency: float, seed: int):
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.seconds = 0.0
+        self.ids = itertools.count(10 ** 12)
+
+    async def rest(self):
+        self.calls += 1
+        if self.latency:
+            started = time.perf_counter()
+            await asyncio.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+            self.seconds += time.perf_counter() - started
+
+class FakeChannel:
+    def __init__(self, discord: FakeDiscord, channel_id: int):
+        self.discord = discord
+        self.id = channel_id
+
+    async def send(self, content=None, **fields):
+        await self.discord.rest()
+        return FakeMessage(self.discord, next(self.discord.ids), self, content)
+
+class FakeMessage:
+    __slots__ = ("discord", "id", "channel", "content")
+
+    def __init__(self, discord: FakeDiscord, message_id: int, channel: FakeChannel, content):
+        self.discord = discord
+        self.id = message_id
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content=None, **fields):
+        await self.discord.rest()
+        self.content = content
+
+class FakeUser:
+    def __init__(self, discord: FakeDiscord, user_id: int):
+        self.id = user_id
+        self.name = f"player{user_id}"
+        self.dm_channel = FakeChannel(discord, DM_CHANNEL_OFFSET + user_id)
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **fields):
+        return await self.dm_channel.send(content, **fields)
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.shard_id = 0
+
+class FakeResponse:
+    def __init__(self, discord: FakeDiscord):
+        self.discord = discord
+
+    async def defer(self, **kwargs):
+        await self.discord.rest()
+
+    async def send_message(self, content=None, **kwargs):
+        await self.discord.rest()
+
+    async def edit_message(self, content=None, **kwargs):
+        await self.discord.rest()
+
+class FakeFollowup:
+    def __init__(self, discord: FakeDiscord):
+        self.discord = discord
+
+    async def send(self, content=None, **kwargs):
+        await self.discord.rest()
+
+class FakeInteraction:
+    def __init__(self, discord: FakeDiscord, user: FakeUser, guild=None, channel=None,
+                 type=InteractionType.application_command, data=None, message=None):
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.type = type
+        self.data = data or {}
+        self.message = message
+        self.response = FakeResponse(discord)
+        self.followup = FakeFollowup(discord)
+
+class FakeBot:
+    def __init__(self, discord: FakeDiscord):
+        self.discord = discord
+        self.user = FakeUser(discord, BOT_USER_ID)
+
+    # ไม่มีใครอยู่ใน cache ของ gateway: ทุกช่อง DM ต้องเปิดผ่าน REST
+    def get_user(self, user_id: int):
+        return None
+
+    async def create_dm(self, user):
+        await self.discord.rest()
+        return FakeChannel(self.discord, DM_CHANNEL_OFFSET + user.id)
+
+    async def wait_until_ready(self):
+        pass
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def db_seconds():
+    return sum(child.sum for _, child in DB_LATENCY.children())
+
+class LoadRun:
+    def __init__(self, cog, discord: FakeDiscord, think: float, abandon: float, seed: int,
+                 spectate=None, spectators: int = 0, watched: int = 0):
+        self.cog = cog
+        self.spectate = spectate
+        self.spectators = spectators
+        self.watched = watched
+        self.discord = discord
+        self.think = think
+        self.abandon = abandon
+        self.rng = random.Random(seed)
+        self.guilds = [FakeGuild(guild_id) for guild_id in range(1, GUILDS + 1)]
+        self.users = {}
+        self.move_latencies = []
+        self.started = set()
+        self.games = 0
+        self.abandoned = 0
+
+    async def request(self, handler, interaction):
+        started = time.perf_counter()
+        await handler(interaction)
+        return time.perf_counter() - started
+
+    async def player(self, user_id: int, ramp: float, play: bool = True, guild=None):
+        await asyncio.sleep(self.rng.random() * ramp)
+        user = self.users[user_id] = FakeUser(self.discord, user_id)
+        guild = guild or self.rng.choice(self.guilds)
+        interaction = FakeInteraction(self.discord, user, guild, FakeChannel(self.discord, guild.id))
+        await self.request(lambda i: self.cog.xomatch.callback(self.cog, i), interaction)
+
+        # คนที่เจอเกมของตัวเองหลังส่ง DM แล้ว (ปกติคือคนที่ถูกจับคู่ตอน xomatch) เป็นคนเล่นเกมนั้นทั้งสองฝั่ง
+        view = live_games.game_for_player(user_id)
+        if view is not None and view.messages and view.game_id not in self.started:
+            self.started.add(view.game_id)
+            self.games += 1
+            if play:
+                await self.play(view)
+
+    # ผู้ชมแต่ละห้องกด /xowatch ก่อนเกมเริ่มเดิน
+    async def watch(self, view):
+        watcher = self.users[view.player_x]
+        await asyncio.gather(*(
+            self.spectate.xowatch.callback(self.spectate, FakeInteraction(
+                self.discord, watcher, self.guilds[0], FakeChannel(self.discord, next(self.discord.ids))
+            ), view.game_id)
+            for _ in range(self.spectators)
+        ))
+
+    async def play(self, view):
+        if self.spectators and self.watched > 0:
+            self.watched -= 1
+            await self.watch(view)
+        messages = {message.channel.id: message for message in view.messages}
+        give_up = self.rng.randint(1, 4) if self.rng.random() < self.abandon else None
+        moves = 0
+        while not view.is_finished():
+            if give_up is not None and moves >= give_up:
+                # ทิ้งเกมไว้ให้ TimeoutChecker
+                self.abandoned += 1
+                return
+            if self.think:
+                await asyncio.sleep(self.think * self.rng.uniform(0.5, 1.5))
+            player_id = view.player_x if view.turn == 'X' else view.player_o
+            index = self.rng.choice([idx for idx, cell in enumerate(view.board) if cell == '-'])
+            interaction = FakeInteraction(
+                self.discord, self.users[player_id],
+                type=InteractionType.component,
+                data={"custom_id": button_custom_id(view.game_id, index)},
+                message=messages[DM_CHANNEL_OFFSET + player_id]
+            )
+            self.move_latencies.append(await self.request(self.cog.dispatch_button, interaction))
+            moves += 1
+
+async def wait_for(condition, timeout: float):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    return condition()
+
+async def measure_memory(cog, discord: FakeDiscord, games: int, seed: int):
+    """
+    heap ของ Python ต่อเกมที่ค้างอยู่ใน registry (view, ปุ่ม, ข้อความ DM ปลอม, ตัวจับเวลา, journal)
+    วัดแยกจากรอบวัดความเร็วเพราะ tracemalloc ทำให้ทุกอย่างช้าลงหลายเท่า
+    """
+    loader = LoadRun(cog, discord, think=0, abandon=0, seed=seed)
+    first_id = 10 ** 7
+    # ไม่ได้วัดเวลาในรอบนี้ ตัดการหน่วง REST ออก
+    discord.latency = 0
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    # ทีละคู่ใน guild เดียวกัน จับคู่กันทันทีโดยไม่ต้องรอข้าม guild
+    for pair in range(games):
+        for user_id in (first_id + 2 * pair, first_id + 2 * pair + 1):
+            await loader.player(user_id, ramp=0, play=False, guild=loader.guilds[0])
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert loader.games == games, f"จับคู่ได้ {loader.games} จาก {games} เกม"
+    return (after - before) / games / 1024
+
+async def run(args):
+    discord = FakeDiscord(args.rest_ms / 1000, args.seed)
+    bot = FakeBot(discord)
+
+    # จับคู่ทันทีที่มีคนรอ ไม่ต้องรอขยายช่วง rating หรือข้าม guild แบบของจริง
+    matchmaking.matchmaker = matchmaking.Matchmaker(
+        widen_every=timedelta(milliseconds=5), cross_guild_after=timedelta(milliseconds=20)
+    )
+    game_timeouts.timeout = timedelta(seconds=args.timeout)
+    # import หลังสลับ matchmaker เพราะ cogs.xo ผูกชื่อ matchmaker ตอน import
+    from cogs.xo import XO
+    from cogs.timeout_checker import TimeoutChecker
+    from cogs.spectate import XOSpectate
+
+    cog = XO(bot)
+    checker = TimeoutChecker(bot)
+    spectate = XOSpectate(bot)
+    try:
+        loader = LoadRun(cog, discord, args.think_ms / 1000, args.abandon, args.seed,
+                         spectate, args.spectators, args.watched)
+        db_before = db_seconds()
+        rest_before = discord.seconds
+        started = time.perf_counter()
+        await asyncio.gather(*(loader.player(user_id, args.ramp) for user_id in range(2, args.players + 2)))
+        played = time.perf_counter() - started
+        db_spent = db_seconds() - db_before
+        rest_spent = discord.seconds - rest_before
+
+        # เกมที่ถูกทิ้งต้องถูกปิดโดย TimeoutChecker
+        expired = await wait_for(lambda: not live_games, args.timeout + 10)
+        await move_journal.flush()
+        still_queued = len(matchmaking.matchmaker)
+        for user_id in list(matchmaking.matchmaker._tickets):
+            await matchmaking.matchmaker.leave(user_id)
+
+        kb_per_game = await measure_memory(cog, discord, args.memory_games, args.seed) if args.memory_games else None
+    finally:
+        cog.cog_unload()
+        checker.cog_unload()
+
+    moves = len(loader.move_latencies)
+    sweep = TIMEOUT_SWEEP.labels()
+    return {
+        "games": loader.games,
+        "moves": moves,
+        "abandoned": loader.abandoned,
+        "expired_by_checker": expired,
+        "still_queued": still_queued,
+        "rest_calls": discord.calls,
+        "seconds": round(played, 3),
+        "moves_per_sec": round(moves / played, 1),
+        "move_p50_ms": round(percentile(loader.move_latencies, 0.50) * 1000, 2),
+        "move_p99_ms": round(percentile(loader.move_latencies, 0.99) * 1000, 2),
+        # สัดส่วนของเวลารอ I/O ทั้งหมดที่เป็น db.database (ที่เหลือคือ REST ของ Discord)
+        # ทั้งสองฝั่งรวมแบบเดียวกัน (ทุก call นับเวลาของตัวเองแม้จะซ้อนกัน) จึงเทียบกันได้
+        "db_share": round(db_spent / (db_spent + rest_spent), 3) if db_spent + rest_spent else 0.0,
+        "db_ms_per_move": round(db_spent / moves * 1000, 3) if moves else 0.0,
+        "timeout_sweep_p99_ms": round((sweep.quantile(0.99) or 0) * 1000, 2),
+        "spectator_edits": REST_EDIT.labels(kind="spectator").count,
+        "kb_per_game": round(kb_per_game, 2) if kb_per_game is not None else None,
+    }
+
+def config_key(args):
+    key = (f"players={args.players},rest_ms={args.rest_ms:g},think_ms={args.think_ms:g},"
+           f"abandon={args.abandon:g},ramp={args.ramp:g}")
+    if args.spectators:
+        key += f",spectators={args.spectators}x{args.watched}"
+    return key
+
+def load_baselines():
+    try:
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def compare(result, baseline, tolerance):
+    regressions = []
+    for name, higher_is_better in TRACKED.items():
+        old, new = baseline.get(name), result[name]
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "❌" if worse > tolerance else "✅"
+        print(f"  {flag} {name:<14} {old:>10} → {new:<10} ({change:+.1%})")
+        if worse > tolerance:
+            regressions.append(name)
+    return regressions
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "games.db")
+        if args.log:
+            from logsetup import setup_logging, stop_logging
+            setup_logging(os.path.join(tmp, "bot.log"), console=False)
+        await database.setup_db()
+        try:
+            result = await run(args)
+        finally:
+            await database.close_db()
+            if args.log:
+                stop_logging()
+
+    key = config_key(args)
+    print(f"{key}")
+    print(f"{result['games']:,} games / {result['moves']:,} moves in {result['seconds']:.2f}s "
+          f"({result['abandoned']} abandoned, expired by TimeoutChecker: {result['expired_by_checker']}, "
+          f"{result['still_queued']} still queued, {result['rest_calls']:,} REST calls)")
+    print(f"moves/sec {result['moves_per_sec']:,}  p50 {result['move_p50_ms']}ms  p99 {result['move_p99_ms']}ms  "
+          f"DB share {result['db_share']:.1%} ({result['db_ms_per_move']}ms/move)  "
+          f"timeout sweep p99 {result['timeout_sweep_p99_ms']}ms  memory {result['kb_per_game']} KB/game")
+    if args.spectators:
+        print(f"spectators: {args.watched} games x {args.spectators} channels → {result['spectator_edits']:,} edits")
+
+    baselines = load_baselines()
+    if args.save:
+        baselines[key] = {**result, "python": platform.python_version(), "machine": platform.machine()}
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 saved baseline → {os.path.relpath(BASELINE_PATH)}")
+        return 0
+    if key not in baselines:
+        print("ℹ️ no baseline for this config (run with --save)")
+        return 0
+    print("vs baseline:")
+    return 1 if compare(result, baselines[key], args.tolerance) else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="XO load simulation")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--rest-ms", type=float, default=50, help="เวลาเฉลี่ยของ REST call ปลอม")
+    parser.add_argument("--think-ms", type=float, default=0, help="เวลาคิดเฉลี่ยก่อนกดแต่ละตา")
+    parser.add_argument("--ramp", type=float, default=2.0, help="ผู้เล่นทยอยกด /xomatch ภายในกี่วินาที")
+    parser.add_argument("--abandon", type=float, default=0.05, help="สัดส่วนเกมที่ถูกทิ้งให้หมดเวลา")
+    parser.add_argument("--timeout", type=float, default=15, help="GAME_TIMEOUT ของรอบนี้ (วินาที)")
+    parser.add_argument("--spectators", type=int, default=0, help="จำนวนห้องที่ดูแต่ละเกมที่มีผู้ชม")
+    parser.add_argument("--watched", type=int, default=5, help="จำนวนเกมที่มีผู้ชม (เมื่อใช้ --spectators)")
+    parser.add_argument("--memory-games", type=int, default=500, help="จำนวนเกมที่ใช้วัดหน่วยความจำ (0 = ข้าม)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="ยอมให้แย่ลงได้กี่ส่วนก่อนถือว่า regression")
+    parser.add_argument("--log", action="store_true", help="เปิด logsetup (JSON log ลงไฟล์ชั่วคราว) ระหว่างวัด")
+    parser.add_argument("--save", action="store_true", help="บันทึกผลเป็น baseline ของ config นี้")
+    parser.add_argument("--seed", type=int, default=11)
+    sys.exit(asyncio.run(main(parser.parse_args())))
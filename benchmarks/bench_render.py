@@ -0,0 +1,88 @@
+"""
+วัดต้นทุนการ render ต่อหนึ่งตาใน handle_move เมื่อมีเกมพร้อมกันจำนวนมาก
+เทียบแบบเดิม (clear_items + สร้าง XOButton ใหม่ 9 ปุ่ม + format ข้อความใหม่ทุกครั้ง)
+กับ render cache (แก้เฉพาะปุ่มที่เปลี่ยน + ข้อความที่ cache ไว้)
+
+    python benchmarks/bench_render.py 1000 5000
+"""
+import asyncio
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nextcord import ButtonStyle
+from nextcord.ui import Button
+from game.views import XOGameView
+
+# build_buttons / current_turn_display ก่อนมี render cache ใช้เป็น baseline
+def legacy_render(view):
+    view.clear_items()
+    for idx in range(9):
+        label = view.board[idx] if view.board[idx] != '-' else '⬜'
+        style = ButtonStyle.green if view.board[idx] == 'X' else (
+                ButtonStyle.red if view.board[idx] == 'O' else ButtonStyle.grey)
+        button = Button(label=label, style=style, row=idx // 3)
+        button.index = idx
+        view.add_item(button)
+    elapsed = datetime.utcnow() - view.start_time
+    remaining = max(timedelta(minutes=5) - elapsed, timedelta(seconds=0))
+    minutes, seconds = divmod(int(remaining.total_seconds()), 60)
+    turn_user = f"<@{view.player_x}>" if view.turn == 'X' else f"<@{view.player_o}>"
+    return f"""🎯 ตาของ {turn_user}
+⏳ เวลาที่เหลือ: {minutes} นาที {seconds} วินาที"""
+
+def cached_render(view, index):
+    view.refresh_cell(index)
+    return view.current_turn_display()
+
+def make_views(count):
+    start_time = datetime.utcnow().isoformat()
+    return [
+        XOGameView(game_id, game_id * 2, game_id * 2 + 1, '---------', 'X', start_time)
+        for game_id in range(count)
+    ]
+
+def play_round(views, moves, render):
+    for view, index in zip(views, moves):
+        view.board[index] = view.turn
+        render(view, index)
+        view.turn = 'O' if view.turn == 'X' else 'X'
+
+def measure(name, views, render):
+    rng = random.Random(3)
+    rounds = [[rng.randrange(9) for _ in views] for _ in range(5)]
+
+    gc.collect()
+    started = time.perf_counter()
+    for moves in rounds[:-1]:
+        play_round(views, moves, render)
+    seconds = time.perf_counter() - started
+
+    # วัดหน่วยความจำแยกอีกรอบ (tracemalloc ทำให้ช้าลง จึงไม่ปนกับการจับเวลา)
+    tracemalloc.start(1)
+    before = tracemalloc.take_snapshot()
+    play_round(views, rounds[-1], render)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "lineno") if stat.count_diff > 0)
+
+    moves = (len(rounds) - 1) * len(views)
+    print(f"{name:<16}{seconds / moves * 1e6:>10.2f} µs/move{peak / len(views):>10.0f} B peak/move"
+          f"{allocations / len(views):>8.1f} retained allocs/move")
+
+async def main(counts):
+    for count in counts:
+        print(f"\n== {count:,} เกมพร้อมกัน ==")
+        measure("legacy", make_views(count), lambda view, index: legacy_render(view))
+        measure("render cache", make_views(count), cached_render)
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000]
+    asyncio.run(main(counts))
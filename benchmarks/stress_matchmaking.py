@@ -0,0 +1,81 @@
+"""
+stress test ของ Matchmaker: ยิง join พร้อมกันหลายพันครั้ง (รวม join ซ้ำของคนเดิม)
+แล้วตรวจว่าไม่มีใครถูกจับคู่ซ้ำ ไม่มีใครจับคู่กับตัวเอง และคิวใน DB ตรงกับในหน่วยความจำ
+
+    python benchmarks/stress_matchmaking.py 5000
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db.database as database
+from game.matchmaking import Matchmaker, Ticket
+
+GUILDS = 20
+
+async def run(players, duplicate_ratio=0.3, seed=7):
+    rng = random.Random(seed)
+    matchmaker = Matchmaker(widen_every=timedelta(milliseconds=5), cross_guild_after=timedelta(milliseconds=20))
+    profiles = {
+        user_id: (rng.randrange(GUILDS), rng.randint(600, 1600))
+        for user_id in range(1, players + 1)
+    }
+    requests = list(profiles) + rng.sample(list(profiles), int(players * duplicate_ratio))
+    rng.shuffle(requests)
+
+    pairs = []
+    in_game = set()
+
+    async def join(user_id):
+        await asyncio.sleep(rng.random() / 100)
+        # เหมือน reject_if_busy: คนที่มีเกมอยู่แล้วเข้าคิวไม่ได้
+        if user_id in in_game:
+            return
+        guild_id, rating = profiles[user_id]
+        opponent = await matchmaker.join(Ticket(user_id, f"user{user_id}", guild_id, guild_id, rating))
+        if opponent is not None:
+            pairs.append((user_id, opponent.user_id))
+            # จำลองเวลาสร้างเกม ระหว่างนี้ทั้งคู่ต้องยังถือว่ายุ่งอยู่
+            await asyncio.sleep(rng.random() / 100)
+            in_game.update((user_id, opponent.user_id))
+            matchmaker.release(user_id, opponent.user_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(join(user_id) for user_id in requests))
+    # รอบสอง: ให้คนที่ค้างคิวได้ช่วงกว้างขึ้นแล้วลองใหม่
+    await asyncio.sleep(0.05)
+    waiting = list(matchmaker._tickets)
+    for user_id in waiting:
+        await matchmaker.leave(user_id)
+    await asyncio.gather(*(join(user_id) for user_id in waiting))
+    seconds = time.perf_counter() - started
+
+    paired = [user_id for pair in pairs for user_id in pair]
+    assert all(a != b for a, b in pairs), "จับคู่กับตัวเอง"
+    assert len(paired) == len(set(paired)), "มีผู้เล่นถูกจับคู่มากกว่าหนึ่งครั้ง"
+    assert not set(paired) & set(matchmaker._tickets), "ผู้เล่นที่จับคู่แล้วยังค้างในคิว"
+    assert not matchmaker._pairing, "ยังมีผู้เล่นค้างสถานะกำลังจับคู่"
+
+    queued_in_db = {row[0] for row in await database.get_queue()}
+    assert queued_in_db == set(matchmaker._tickets), "คิวใน DB ไม่ตรงกับในหน่วยความจำ"
+
+    print(f"{len(requests):,} join requests ({players:,} players) in {seconds:.2f}s")
+    print(f"{len(pairs):,} pairs, {len(matchmaker):,} still queued, no double pairings ✅")
+
+async def main(players):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "games.db")
+        await database.setup_db()
+        try:
+            await run(players)
+        finally:
+            await database.close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000))
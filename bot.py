@@ -1,16 +1,33 @@
 import nextcord
 from nextcord.ext import commands
 import logging
-import asyncio
+import hashlib
+import json
 import os
-from db.database import setup_db
+import time
+from contextlib import contextmanager
+from db.database import setup_db, close_db, get_meta, set_meta
+from db.journal import move_journal
+from game import cluster
+from logsetup import setup_logging, stop_logging
 from dotenv import load_dotenv
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 
-# Logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s", filename="bot.log", filemode="a")
+# โหมด cluster (ตั้งโดย launcher.py): process นี้ถือเฉพาะ shard ในช่วงที่กำหนด
+CLUSTER_ID = os.getenv("CLUSTER_ID")
+SHARD_IDS = cluster.parse_shard_ids(os.getenv("SHARD_IDS"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+# ตั้งเป็น 1 เพื่อบังคับ sync slash command แม้ hash ไม่เปลี่ยน (เช่น มีคนลบ command ใน Discord เอง)
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC") == "1"
+
+# Logging: เขียนผ่านคิวโดย thread เบื้องหลัง (โหมด cluster แยกไฟล์ต่อ worker เพราะหมุนไฟล์ร่วมกันไม่ได้)
+setup_logging(
+    f"bot-{CLUSTER_ID}.log" if CLUSTER_ID is not None else "bot.log",
+    cluster_id=int(CLUSTER_ID) if CLUSTER_ID is not None else None
+)
+log = logging.getLogger("bot")
 
 # Intents
 intents = nextcord.Intents.default()
@@ -19,35 +36,129 @@ intents.members = True
 intents.messages = True
 intents.message_content = True
 
+# ⏱️ จับเวลาแต่ละขั้นตอนตอนเริ่มบอท
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def report(self):
+        phases = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        total = time.perf_counter() - self.started
+        log.info("⏱️ Startup %.2fs: %s", total, phases, extra={"event": "startup", "seconds": total})
+
+# 🔑 hash ของ schema slash command ทั้งหมด เปลี่ยนเมื่อชื่อ/คำอธิบาย/ตัวเลือกของ command ใดเปลี่ยน
+def command_schema_hash(app_commands):
+    payloads = sorted(
+        (json.dumps({"payload": command.get_payload(None), "guild_ids": sorted(command.guild_ids)}, sort_keys=True)
+         for command in app_commands)
+    )
+    return hashlib.sha256("\n".join(payloads).encode()).hexdigest()
+
 # Bot setup
-bot = commands.AutoShardedBot(command_prefix="!", intents=intents)
+class XOBot(commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.startup = StartupTimer()
+        self.initialized = False
+
+    async def initialize(self):
+        """
+        งานเริ่มต้นที่ต้องทำครั้งเดียวต่อ process (ก่อนต่อ gateway): DB, cluster, cogs
+        """
+        if self.initialized:
+            return
+        with self.startup.phase("db"):
+            # เปิด connection pool บน loop เดียวกับที่บอทใช้
+            await setup_db()
+        if CLUSTER_ID is not None:
+            with self.startup.phase("cluster"):
+                await cluster.join_cluster(int(CLUSTER_ID), SHARD_IDS)
+        with self.startup.phase("cogs"):
+            self.load_cogs()
+        self.initialized = True
 
+    def load_cogs(self):
+        # รายการ Cog ที่ต้องโหลด
+        extensions = ["cogs.xo", "cogs.status", "cogs.leaderboard", "cogs.spectate", "cogs.metrics"]
+        # งานที่ต้องมีแค่ตัวเดียวทั้ง cluster อยู่กับ worker เจ้าของเกม
+        if cluster.owns_games():
+            extensions += ["cogs.timeout_checker", "cogs.maintenance"]
+
+        for ext in extensions:
+            if ext in self.extensions:
+                continue
+            try:
+                self.load_extension(ext)
+                log.info("✅ Loaded extension: %s", ext)
+            except Exception:
+                log.exception("❌ Failed to load extension %s", ext)
+
+    # แทน on_connect เดิมของ nextcord ที่ sync command ทุกครั้งที่ต่อ gateway ใหม่
+    # command ที่ไม่ได้ sync จะถูกจับคู่กับ ID ของ Discord เองตอนถูกเรียกครั้งแรก (lazy_load_commands)
+    async def on_connect(self):
+        self.add_all_application_commands()
+
+    async def sync_commands_if_changed(self):
+        """
+        sync slash command เฉพาะเมื่อ schema ต่างจากที่ sync ไว้ล่าสุด คืน True ถ้า sync
+        """
+        self.add_all_application_commands()
+        key = f"command_hash:{self.application_id}"
+        schema_hash = command_schema_hash(self.get_all_application_commands())
+        if not FORCE_COMMAND_SYNC and await get_meta(key) == schema_hash:
+            return False
+        await self.sync_all_application_commands()
+        await set_meta(key, schema_hash)
+        return True
+
+    async def close(self):
+        await super().close()
+        if cluster.link is not None:
+            await cluster.link.close()
+        await move_journal.close()
+        await close_db()
+        stop_logging()
+
+bot = XOBot(command_prefix="!", intents=intents, shard_ids=SHARD_IDS, shard_count=SHARD_COUNT)
+
+# on_ready ถูกเรียกซ้ำทุกครั้งที่ต่อ gateway ใหม่ งานเริ่มต้นทำแค่ครั้งแรก
 @bot.event
 async def on_ready():
-    print(f"✅ Logged in as {bot.user} | Shards: {bot.shard_count}")
-    await setup_db()
+    if "gateway" in bot.startup.phases:
+        log.info("🔁 Reconnected as %s", bot.user)
+        return
 
-    # รายการ Cog ที่ต้องโหลด
-    extensions = ["cogs.xo", "cogs.status", "cogs.timeout_checker"]
+    bot.startup.phases["gateway"] = time.perf_counter() - bot.startup.started - sum(bot.startup.phases.values())
+    log.info("✅ Logged in as %s | Shards: %s of %s", bot.user, SHARD_IDS or "all", bot.shard_count)
+    await bot.initialize()
 
-    for ext in extensions:
-        try:
-            bot.load_extension(ext)
-            print(f"✅ Loaded extension: {ext}")
-        except Exception as e:
-            print(f"❌ Failed to load extension {ext}: {e}")
+    # โหมด cluster: ลงทะเบียน slash command จาก worker เจ้าของเกมตัวเดียวพอ
+    if cluster.owns_games():
+        with bot.startup.phase("command sync"):
+            try:
+                if await bot.sync_commands_if_changed():
+                    log.info("🔃 Slash commands synced")
+                else:
+                    log.info("🔃 Slash commands unchanged, skipped sync")
+            except Exception:
+                log.exception("❌ Failed to sync commands")
 
-    try:
-        await bot.sync_all_application_commands()
-        print("🔃 Slash commands synced")
-    except Exception as e:
-        print(f"❌ Failed to sync commands: {e}")
+    bot.startup.report()
 
 @bot.event
 async def on_command_error(ctx, error):
     await ctx.send(f"❗ เกิดข้อผิดพลาด: {error}")
-    logging.exception("Command Error: %s", str(error))
+    log.error("Command Error: %s", error, exc_info=error)
 
 if __name__ == "__main__":
-    asyncio.run(setup_db())
+    bot.loop.run_until_complete(bot.initialize())
     bot.run(TOKEN)
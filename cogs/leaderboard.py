@@ -0,0 +1,71 @@
+from nextcord.ext import commands
+from nextcord import Interaction, slash_command, Embed, SlashOption, Member
+from game.ratings import leaderboard
+
+class XOLeaderboard(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @slash_command(name="leaderboard", description="ดูอันดับคะแนน XO")
+    async def show_leaderboard(
+        self,
+        interaction: Interaction,
+        page: int = SlashOption(
+            name="page",
+            description="หน้าที่ต้องการดู",
+            required=False,
+            default=1,
+            min_value=1
+        )
+    ):
+        entries = await leaderboard.page(page)
+        pages = max(1, -(-leaderboard.players // leaderboard.page_size))
+        if not entries:
+            await interaction.response.send_message(embed=Embed(
+                description=f"📭 ไม่มีข้อมูลในหน้านี้ (มีทั้งหมด {pages} หน้า)",
+                color=0x95A5A6
+            ), ephemeral=True)
+            return
+
+        lines = [
+            f"**#{rank}** <@{user_id}> — **{rating}** ({wins}W / {losses}L / {draws}D)"
+            for rank, user_id, rating, wins, losses, draws in entries
+        ]
+        embed = Embed(
+            title="🏆 อันดับคะแนน XO",
+            description="\n".join(lines),
+            color=0xF1C40F
+        )
+        embed.set_footer(text=f"หน้า {page}/{pages} • ผู้เล่นทั้งหมด {leaderboard.players} คน")
+        await interaction.response.send_message(embed=embed)
+
+    @slash_command(name="profile", description="ดูคะแนนและสถิติ XO")
+    async def profile(
+        self,
+        interaction: Interaction,
+        user: Member = SlashOption(
+            name="user",
+            description="ผู้เล่นที่ต้องการดู (ไม่ใส่ = ตัวเอง)",
+            required=False,
+            default=None
+        )
+    ):
+        user = user or interaction.user
+        stats = await leaderboard.profile(user.id)
+        games = stats["wins"] + stats["losses"] + stats["draws"]
+        rank = f"#{stats['rank']} จาก {leaderboard.players} คน" if stats["rank"] else "ยังไม่มีอันดับ"
+        win_rate = f"{stats['wins'] / games:.0%}" if games else "-"
+
+        embed = Embed(
+            title=f"📇 โปรไฟล์ของ {user.display_name}",
+            description=f"""⭐ คะแนน: **{stats['rating']}**
+🏅 อันดับ: **{rank}**
+🎮 เล่นทั้งหมด: **{games}** เกม
+✅ ชนะ **{stats['wins']}** • ❌ แพ้ **{stats['losses']}** • 🤝 เสมอ **{stats['draws']}**
+📈 อัตราชนะ: **{win_rate}**""",
+            color=0x9B59B6
+        )
+        await interaction.response.send_message(embed=embed)
+
+def setup(bot):
+    bot.add_cog(XOLeaderboard(bot))
@@ -0,0 +1,13 @@
+from nextcord.ext import commands
+from db.archive import archive_compactor
+
+class Maintenance(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        archive_compactor.start()
+
+    def cog_unload(self):
+        archive_compactor.stop()
+
+def setup(bot):
+    bot.add_cog(Maintenance(bot))
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import os
+from nextcord.ext import commands
+from nextcord import Interaction, slash_command, Embed, Permissions
+from db.journal import move_journal
+from game.registry import live_games
+from game.users import user_cache
+from game.fanout import spectator_fanout
+from metrics import metrics, start_metrics_server
+from logsetup import dropped_records
+
+log = logging.getLogger(__name__)
+
+# พอร์ตของ /metrics (โหมด cluster: launcher ใช้พอร์ตนี้ worker ที่ i ใช้พอร์ต + 1 + i), 0 = ปิด
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+def metrics_port():
+    if not METRICS_PORT:
+        return None
+    cluster_id = os.getenv("CLUSTER_ID")
+    return METRICS_PORT + 1 + int(cluster_id) if cluster_id is not None else METRICS_PORT
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.1f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+class Metrics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.server = None
+        self.server_task = None
+        metrics.gauge("xo_live_games", "Games held in this process's registry", lambda: len(live_games))
+        metrics.gauge("xo_journal_pending", "Games with moves not yet written to the DB", lambda: len(move_journal))
+        metrics.gauge("xo_dm_channel_cache", "DM channels held in game.users.user_cache", lambda: len(user_cache))
+        metrics.gauge("xo_spectator_pending", "Spectator boards waiting for their next edit", lambda: len(spectator_fanout))
+        metrics.gauge("xo_log_dropped", "Log records dropped because the log queue was full", dropped_records)
+        port = metrics_port()
+        if port:
+            self.server_task = asyncio.create_task(self.start_server(port))
+
+    async def start_server(self, port: int):
+        try:
+            self.server = await start_metrics_server(port)
+            log.info("📈 Metrics on http://127.0.0.1:%s/metrics", port)
+        except OSError as e:
+            log.error("❌ เปิดพอร์ต metrics %s ไม่ได้: %s", port, e)
+
+    def cog_unload(self):
+        if self.server_task is not None:
+            self.server_task.cancel()
+        if self.server is not None:
+            self.server.close()
+
+    @slash_command(
+        name="xometrics",
+        description="ดูเวลาตอบสนองของระบบ XO (ผู้ดูแล)",
+        default_member_permissions=Permissions(administrator=True)
+    )
+    async def xometrics(self, interaction: Interaction):
+        lines = []
+        for histogram in metrics.histograms():
+            for labels, child in histogram.children():
+                if not child.count:
+                    continue
+                label = ",".join(labels.values())
+                name = histogram.name.removeprefix("xo_").removesuffix("_seconds")
+                lines.append(
+                    f"`{name}{'{' + label + '}' if label else ''}` n={child.count} "
+                    f"p50={format_seconds(child.quantile(0.5))} p99={format_seconds(child.quantile(0.99))} "
+                    f"avg={format_seconds(child.sum / child.count)}"
+                )
+
+        embed = Embed(
+            title="📈 XO metrics",
+            description="\n".join(lines)[:4000] or "ยังไม่มีข้อมูล",
+            color=0x34495E
+        )
+        embed.set_footer(text=f"เกมใน process นี้: {len(live_games)} • รอเขียน DB: {len(move_journal)}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(Metrics(bot))
@@ -0,0 +1,121 @@
+import logging
+import nextcord
+from nextcord.ext import commands
+from nextcord import Interaction, slash_command, Embed, SlashOption, AllowedMentions
+from db.database import get_game_state, save_spectator_message, count_spectator_messages, delete_spectator_message
+from game.views import load_game, spectator_message
+from game.fanout import spectator_fanout
+from game.render import spectator_text
+import game.cluster as cluster
+
+log = logging.getLogger(__name__)
+
+# จำนวนห้องที่ดูเกมเดียวกันได้สูงสุด
+MAX_SPECTATORS = 500
+
+class XOSpectate(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        # โหมด cluster: worker อื่นแจ้งข้อความผู้ชมใหม่มาที่เจ้าของเกม (game.cluster.hand_off_spectator)
+        if cluster.link is not None:
+            cluster.link.on("spectator_added", self.on_spectator_added)
+
+    async def on_spectator_added(self, game_id, channel_id, message_id):
+        message = spectator_message(self.bot, channel_id, message_id)
+        view = await load_game(self.bot, game_id)
+        if view is not None and not view.is_finished():
+            view.add_spectator(message, refresh=True)
+        else:
+            await self.close_board(game_id, message, view)
+
+    # 🏁 เกมจบระหว่างส่งกระดาน: แถวที่บันทึกหลัง end_game จะค้างอยู่ → ลบทิ้ง แล้วแก้กระดานเป็นผลสุดท้าย
+    async def close_board(self, game_id: int, message, view=None):
+        await delete_spectator_message(game_id, message.channel.id, message.id)
+        if view is not None:
+            content = view.final_display()
+        else:
+            state = await get_game_state(game_id)
+            if not state:
+                return
+            content = spectator_text(game_id, state["player_x"], state["player_o"], state["board"], state["turn"],
+                                     "🏁 เกมนี้จบแล้ว")
+        spectator_fanout.submit(message, content=content)
+
+    # คืน (view, ข้อความกระดาน) ของเกมที่ยังเล่นอยู่ หรือ (None, None)
+    # worker ที่ไม่ได้ถือเกมอ่านจาก DB (อาจช้ากว่า journal เล็กน้อย เจ้าของเกมจะแก้ให้เป็นสถานะล่าสุด)
+    async def current_board(self, game_id: int):
+        if cluster.owns_games():
+            view = await load_game(self.bot, game_id)
+            if view is None:
+                return None, None
+            return view, view.spectator_display()
+        state = await get_game_state(game_id)
+        if not state or state["status"] != "active":
+            return None, None
+        return None, spectator_text(game_id, state["player_x"], state["player_o"], state["board"], state["turn"])
+
+    @slash_command(name="xowatch", description="ดูกระดานเกม XO แบบสดในห้องนี้")
+    async def xowatch(
+        self,
+        interaction: Interaction,
+        game: int = SlashOption(
+            name="game",
+            description="หมายเลขเกม (ดูได้จากประกาศตอนเริ่มเกม)",
+            min_value=1
+        )
+    ):
+        if interaction.guild is None:
+            await interaction.response.send_message("⛔ ใช้คำสั่งนี้ได้ในเซิร์ฟเวอร์เท่านั้น", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        view, content = await self.current_board(game)
+        if content is None:
+            await interaction.followup.send(embed=Embed(
+                description=f"❓ ไม่พบเกม #{game} ที่กำลังเล่นอยู่",
+                color=0x95A5A6
+            ), ephemeral=True)
+            return
+        if await count_spectator_messages(game) >= MAX_SPECTATORS:
+            await interaction.followup.send(embed=Embed(
+                description=f"👥 เกม #{game} มีห้องที่ดูอยู่ครบ {MAX_SPECTATORS} ห้องแล้ว",
+                color=0xFFC300
+            ), ephemeral=True)
+            return
+
+        try:
+            # ไม่ mention ผู้เล่นซ้ำทุกห้องที่ดู
+            message = await interaction.channel.send(content=content, allowed_mentions=AllowedMentions.none())
+        except nextcord.HTTPException:
+            log.warning("❌ ส่งกระดานผู้ชมเกม %s ไม่ได้", game, extra={"game_id": game, "guild_id": interaction.guild.id})
+            await interaction.followup.send(embed=Embed(
+                title="❗ ส่งข้อความในห้องนี้ไม่ได้",
+                description="โปรดตรวจสอบสิทธิ์การส่งข้อความของบอทในห้องนี้",
+                color=0xE74C3C
+            ), ephemeral=True)
+            return
+
+        replaced = await save_spectator_message(game, message.channel.id, message.id)
+        if view is None:
+            cluster.hand_off_spectator(game, message)
+        elif view.is_finished():
+            await self.close_board(game, message, view)
+        else:
+            # มีตาเดินระหว่างส่งข้อความ → แก้เป็นกระดานล่าสุด
+            view.add_spectator(message, refresh=view.spectator_display() != content)
+        log.info("👀 Watching game %s", game, extra={"event": "spectate", "game_id": game, "guild_id": interaction.guild.id})
+
+        # ห้องนี้ดูเกมนี้อยู่แล้ว: ลบกระดานเก่าที่จะไม่ถูกอัปเดตอีก
+        if replaced is not None:
+            try:
+                await spectator_message(self.bot, message.channel.id, replaced).delete()
+            except nextcord.HTTPException:
+                pass
+
+        await interaction.followup.send(embed=Embed(
+            description=f"✅ ถ่ายทอดเกม #{game} ในห้องนี้แล้ว",
+            color=0x2ECC71
+        ), ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(XOSpectate(bot))
@@ -1,23 +1,32 @@
+import asyncio
 from nextcord.ext import commands
 from nextcord import Interaction, slash_command, Embed
-from db.database import count_active_games, count_active_players
+from game.counters import live_counters
+from game.cluster import cluster_stats, owns_games
 from datetime import datetime
 
 class XOStatus(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # โหมด cluster: เกมทั้งหมดอยู่ที่ worker เจ้าของเกม worker อื่นไม่ต้องนับซ้ำ
+        if owns_games():
+            self.rebuild_task = asyncio.create_task(self.rebuild_counters())
+
+    # ต้องรู้ id ของบอทก่อน (หลัง login) จึงจะตัดบัญชีบอทออกจากเกม /xobot ได้
+    async def rebuild_counters(self):
+        await self.bot.wait_until_ready()
+        await live_counters.rebuild(self.bot.user.id)
 
     @slash_command(name="status", description="ดูสถานะของระบบ XO")
     async def status(self, interaction: Interaction):
-        await interaction.response.defer()
-
-        num_games = await count_active_games()
-        num_players = await count_active_players()
-
+        # ตัวนับอยู่ในหน่วยความจำทั้งหมด (โหมด cluster ถาม coordinator บน localhost) ตอบได้ทันทีไม่ต้อง defer
+        stats = await cluster_stats()
         embed = Embed(
             title="📊 สถานะระบบ XO",
-            description=f"""🕹️ เกมที่กำลังดำเนินอยู่: **{num_games}** เกม
-👥 ผู้เล่นที่กำลังเล่นอยู่: **{num_players}** คน
+            description=f"""🕹️ เกมที่กำลังดำเนินอยู่: **{stats['active_games']}** เกม
+👥 ผู้เล่นที่กำลังเล่นอยู่: **{stats['active_players']}** คน
+⌛ ผู้เล่นที่รออยู่ในคิว: **{stats['queued']}** คน
+📈 เกมที่เริ่ม / จบ ใน 1 นาทีล่าสุด: **{stats['started']}** / **{stats['finished']}**
 
 🕒 เวลาปัจจุบัน: {datetime.utcnow().strftime('%d %B %Y - %H:%M UTC')}
 
@@ -28,8 +37,11 @@ class XOStatus(commands.Cog):
 ขอให้สนุกกับการเล่น XO!""",
             color=0x1ABC9C
         )
+        if interaction.guild:
+            shard_id = interaction.guild.shard_id
+            embed.set_footer(text=f"Shard {shard_id}: {dict(stats['shards']).get(shard_id, 0)} เกม • {stats['workers']} process")
 
-        await interaction.followup.send(embed=embed)
+        await interaction.response.send_message(embed=embed)
 
 def setup(bot):
     bot.add_cog(XOStatus(bot))
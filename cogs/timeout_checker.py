@@ -1,47 +1,45 @@
 
-from nextcord.ext import commands, tasks
-from datetime import datetime, timedelta
-from db.database import get_all_active_games, get_game_state
-from game.views import XOGameView
+import asyncio
+import logging
+from nextcord.ext import commands
+from game.scheduler import game_timeouts
+from game.views import load_games
+from game.users import user_cache
+
+log = logging.getLogger(__name__)
 
 class TimeoutChecker(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.check_expired_games.start()
+        game_timeouts.start(self.expire_games)
 
     def cog_unload(self):
-        self.check_expired_games.cancel()
-
-    @tasks.loop(seconds=30)
-    async def check_expired_games(self):
-        now = datetime.utcnow()
-        active_games = await get_all_active_games()
-
-        for game_id, start_time_str in active_games:
-            try:
-                start_time = datetime.fromisoformat(start_time_str)
-                if now - start_time > timedelta(minutes=5):
-                    state = await get_game_state(game_id)
-                    if state and state["status"] == "active":
-                        view = XOGameView(
-                            game_id=game_id,
-                            player_x=state["player_x"],
-                            player_o=state["player_o"],
-                            board=state["board"],
-                            turn=state["turn"],
-                            start_time=state["start_time"]
-                        )
-                        try:
-                            user1 = await self.bot.fetch_user(state["player_x"])
-                            user2 = await self.bot.fetch_user(state["player_o"])
-                            msg1 = await user1.send(content="⏰ หมดเวลา! เกมนี้ถือว่าเสมอ", view=view)
-                            msg2 = await user2.send(content="⏰ หมดเวลา! เกมนี้ถือว่าเสมอ", view=view)
-                            view.messages = [msg1, msg2]
-                            await view.expire_due_to_timeout()
-                        except Exception as e:
-                            print(f"❌ ไม่สามารถส่ง DM เพื่อหมดเวลาเกม {game_id}: {e}")
-            except Exception as e:
-                print(f"⚠️ ข้อผิดพลาดใน game {game_id}: {e}")
+        game_timeouts.stop()
+
+    # ⏰ ถูกเรียกโดย game_timeouts ตรงเวลาหมดอายุ พร้อมเกมที่หมดเวลาทั้งชุด
+    # view ที่อยู่ใน live_games หรือโหลดกลับจาก DB จะแก้ข้อความ DM เดิมได้เลย ไม่ต้องส่งใหม่
+    async def expire_games(self, game_ids):
+        # เกมที่หมดเวลาระหว่างบอทปิดจะถึงกำหนดทันทีตอนเริ่ม ต้องรอ login ก่อนจึงจะแก้ข้อความได้
+        await self.bot.wait_until_ready()
+        views = await load_games(self.bot, game_ids)
+        await asyncio.gather(*(self.expire_game(view) for view in views.values()))
+
+    async def expire_game(self, view):
+        try:
+            if not view.messages:
+                await self.send_expiry_dms(view)
+            await view.expire_due_to_timeout()
+        except Exception:
+            log.exception("⚠️ ข้อผิดพลาดใน game %s", view.game_id, extra={"game_id": view.game_id})
+
+    # เกมที่สร้างก่อนมีตาราง game_messages ไม่รู้ข้อความเดิม ต้องส่ง DM แจ้งใหม่
+    async def send_expiry_dms(self, view):
+        try:
+            msg1 = await user_cache.send(self.bot, view.player_x, content="⏰ หมดเวลา! เกมนี้ถือว่าเสมอ", view=view)
+            msg2 = await user_cache.send(self.bot, view.player_o, content="⏰ หมดเวลา! เกมนี้ถือว่าเสมอ", view=view)
+            view.messages = [msg1, msg2]
+        except Exception as e:
+            log.warning("❌ ไม่สามารถส่ง DM เพื่อหมดเวลาเกม %s: %s", view.game_id, e, extra={"game_id": view.game_id})
 
 def setup(bot):
     bot.add_cog(TimeoutChecker(bot))
@@ -1,104 +1,90 @@
+import logging
 from nextcord.ext import commands
-from nextcord import Interaction, slash_command, Embed
-from db.database import (
-    add_to_queue, find_match, create_game, get_game_state,
-    is_in_queue, is_in_game
-)
-from game.views import XOGameView
+from nextcord import Interaction, InteractionType, slash_command, Embed, SlashOption
+from db.database import create_game, get_game_state, is_in_game, save_game_messages
+from game.views import XOGameView, load_game, parse_custom_id
+from game.registry import live_games
+from game.bot_ai import BotOpponent
+from game.matchmaking import matchmaker, Ticket
+from game.cluster import register_game, hand_off_messages, persist_opening
+from game.ratings import leaderboard
+from game.users import user_cache
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
 class XO(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        matchmaker.start()
 
-    @slash_command(name="xomatch", description="เข้าคิวเพื่อเล่นเกม XO")
-    async def xomatch(self, interaction: Interaction):
-        print("🔹 START: /xomatch called by", interaction.user)
-        await interaction.response.defer(ephemeral=True)
+    def cog_unload(self):
+        matchmaker.stop()
 
-        user = interaction.user
-        user_id = user.id
+    # 🎛️ dispatcher กลางของปุ่ม XO ทุกเกม: อ่าน game_id/ช่องจาก custom_id
+    # แล้วหา view จาก registry หรือโหลดจาก DB จึงใช้ได้ทั้งหลังรีสตาร์ทบอท
+    @commands.Cog.listener("on_interaction")
+    async def dispatch_button(self, interaction: Interaction):
+        if interaction.type != InteractionType.component:
+            return
+        parsed = parse_custom_id(interaction.data.get("custom_id", ""))
+        if parsed is None:
+            return
+
+        game_id, index = parsed
+        view = await load_game(self.bot, game_id)
+        if view is None:
+            await interaction.response.send_message("⏰ เกมนี้จบไปแล้ว!", ephemeral=True)
+            return
+        if index >= len(view.board):
+            return
+        await view.handle_move(interaction, index)
 
-        if await is_in_queue(user_id):
+    # ⛔ ตอบกลับและคืน True ถ้าผู้เล่นอยู่ในคิวหรือมีเกมค้างอยู่
+    async def reject_if_busy(self, interaction: Interaction, user_id: int):
+        if await matchmaker.check_busy(user_id):
             embed = Embed(
                 title="⛔ คุณอยู่ในคิวอยู่แล้ว",
                 description="ไม่สามารถเข้าคิวซ้ำได้ กรุณารอระบบจับคู่ หรือใช้ `/cancel` เพื่อออกจากคิว",
                 color=0xFF5733
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
-            return
+            return True
 
-        if await is_in_game(user_id):
+        if live_games.game_for_player(user_id) or await is_in_game(user_id):
             embed = Embed(
                 title="⚠️ คุณมีเกมที่ยังไม่จบ",
                 description="กรุณาเล่นเกมที่ค้างไว้ให้จบก่อน หรือใช้คำสั่ง `/forfeit` เพื่อยอมแพ้",
                 color=0xFFC300
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
-            return
+            return True
 
-        await add_to_queue(user_id, str(user), interaction.guild.id, interaction.channel.id)
-        print("✅ Added to queue:", user_id)
+        return False
 
-        opponent = await find_match(user_id)
-        if opponent:
-            print("✅ Found opponent:", opponent)
-            game_id, _ = await create_game(user_id, opponent)
-            print("✅ Game created:", game_id)
-
-            state = await get_game_state(game_id)
-            if not state:
-                embed = Embed(
-                    title="❗ โหลดสถานะเกมไม่สำเร็จ",
-                    description="โปรดลองใหม่ภายหลัง หรือแจ้งผู้ดูแลระบบ",
-                    color=0xE74C3C
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-
-            view = XOGameView(
-                game_id=game_id,
-                player_x=state["player_x"],
-                player_o=state["player_o"],
-                board=state["board"],
-                turn=state["turn"],
-                start_time=state["start_time"]
-            )
+    @slash_command(name="xomatch", description="เข้าคิวเพื่อเล่นเกม XO")
+    async def xomatch(self, interaction: Interaction):
+        await interaction.response.defer(ephemeral=True)
 
-            try:
-                user1 = await self.bot.fetch_user(state["player_x"])
-                user2 = await self.bot.fetch_user(state["player_o"])
-                print("📤 Sending DM to", user1, "and", user2)
+        user = interaction.user
+        user_id = user.id
+        context = {"user_id": user_id, "guild_id": interaction.guild.id, "shard_id": interaction.guild.shard_id}
+        log.info("🔹 /xomatch called by %s", user, extra={"event": "xomatch", **context})
 
-                msg1 = await user1.send(content=view.current_turn_display(), view=view)
-                msg2 = await user2.send(content=view.current_turn_display(), view=view)
-                view.messages = [msg1, msg2]
+        if await self.reject_if_busy(interaction, user_id):
+            return
 
-                embed_dm = Embed(
-                    title="🎮 เกมเริ่มแล้ว!",
-                    description=f"""ผู้เล่น <@{state['player_x']}> พบกับ <@{state['player_o']}>
-เกมได้ถูกส่งไปยัง DM ของคุณทั้งคู่แล้ว กรุณาตรวจสอบ!""",
-                    color=0x2ECC71
-                )
-
-                await interaction.channel.send(
-                    content=f"<@{state['player_x']}> <@{state['player_o']}>",
-                    embed=embed_dm
-                )
-
-                await interaction.followup.send(embed=Embed(
-                    description="✅ เกมของคุณเริ่มต้นแล้ว! เช็ค DM เพื่อเริ่มเล่น",
-                    color=0x2ECC71
-                ), ephemeral=True)
-
-            except Exception as e:
-                print("❌ Failed to send DM:", e)
-                await interaction.followup.send(embed=Embed(
-                    title="❗ ไม่สามารถส่ง DM ได้",
-                    description="โปรดตรวจสอบว่าคุณเปิดรับข้อความจากสมาชิกในเซิร์ฟเวอร์",
-                    color=0xE74C3C
-                ), ephemeral=True)
+        user_cache.prefetch(self.bot, user_id)
+        rating = await leaderboard.rating(user_id)
+        opponent = await matchmaker.join(Ticket(user_id, str(user), interaction.guild.id, interaction.channel.id, rating))
+        if opponent:
+            log.info("✅ Found opponent %s", opponent.user_id, extra={"event": "matched", "opponent_id": opponent.user_id, **context})
+            try:
+                await self.start_match(interaction, user_id, opponent.user_id)
+            finally:
+                matchmaker.release(user_id, opponent.user_id)
         else:
+            log.info("✅ Added to queue", extra={"event": "queued", **context})
             embed = Embed(
                 title="⌛ เข้าคิวสำเร็จ",
                 description="""ระบบกำลังรอผู้เล่นคนอื่นเข้าร่วม
@@ -108,5 +94,125 @@ class XO(commands.Cog):
             embed.set_footer(text=f"เข้าคิวเมื่อ: {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}")
             await interaction.followup.send(embed=embed, ephemeral=True)
 
+    async def start_match(self, interaction: Interaction, user_id: int, opponent_id: int):
+        game_id, _ = await create_game(user_id, opponent_id)
+        log.info("✅ Game created", extra={"event": "game_created", "game_id": game_id, "user_id": user_id, "opponent_id": opponent_id})
+
+        state = await get_game_state(game_id)
+        if not state:
+            embed = Embed(
+                title="❗ โหลดสถานะเกมไม่สำเร็จ",
+                description="โปรดลองใหม่ภายหลัง หรือแจ้งผู้ดูแลระบบ",
+                color=0xE74C3C
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        view = XOGameView(
+            game_id=game_id,
+            player_x=state["player_x"],
+            player_o=state["player_o"],
+            board=state["board"],
+            turn=state["turn"],
+            start_time=state["start_time"]
+        )
+        shard_id = interaction.guild and interaction.guild.shard_id
+        register_game(view, shard_id)
+
+        try:
+            # ช่อง DM ถูกเปิดไว้ตั้งแต่ตอนเข้าคิว (user_cache.prefetch) เหลือแค่ส่งข้อความ
+            msg1 = await user_cache.send(self.bot, state["player_x"], content=view.current_turn_display(), view=view)
+            msg2 = await user_cache.send(self.bot, state["player_o"], content=view.current_turn_display(), view=view)
+            view.messages = [msg1, msg2]
+            await save_game_messages(game_id, [(msg.channel.id, msg.id) for msg in view.messages])
+            hand_off_messages(game_id)
+
+            embed_dm = Embed(
+                title="🎮 เกมเริ่มแล้ว!",
+                description=f"""ผู้เล่น <@{state['player_x']}> พบกับ <@{state['player_o']}>
+เกมได้ถูกส่งไปยัง DM ของคุณทั้งคู่แล้ว กรุณาตรวจสอบ!""",
+                color=0x2ECC71
+            )
+            embed_dm.set_footer(text=f"👀 ดูเกมนี้: /xowatch game:{game_id}")
+
+            await interaction.channel.send(
+                content=f"<@{state['player_x']}> <@{state['player_o']}>",
+                embed=embed_dm
+            )
+
+            await interaction.followup.send(embed=Embed(
+                description="✅ เกมของคุณเริ่มต้นแล้ว! เช็ค DM เพื่อเริ่มเล่น",
+                color=0x2ECC71
+            ), ephemeral=True)
+
+        except Exception:
+            log.exception("❌ Failed to send DM", extra={"game_id": game_id})
+            await interaction.followup.send(embed=Embed(
+                title="❗ ไม่สามารถส่ง DM ได้",
+                description="โปรดตรวจสอบว่าคุณเปิดรับข้อความจากสมาชิกในเซิร์ฟเวอร์",
+                color=0xE74C3C
+            ), ephemeral=True)
+
+    @slash_command(name="xobot", description="เล่นเกม XO กับบอท")
+    async def xobot(
+        self,
+        interaction: Interaction,
+        difficulty: str = SlashOption(
+            name="difficulty",
+            description="ระดับความยาก",
+            choices={"ง่าย": "easy", "ปานกลาง": "medium", "ยาก": "hard"},
+            required=False,
+            default="hard"
+        )
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        user_id = interaction.user.id
+        if await self.reject_if_busy(interaction, user_id):
+            return
+
+        game_id, _ = await create_game(user_id, self.bot.user.id, bot_difficulty=difficulty)
+        state = await get_game_state(game_id)
+        if not state:
+            embed = Embed(
+                title="❗ โหลดสถานะเกมไม่สำเร็จ",
+                description="โปรดลองใหม่ภายหลัง หรือแจ้งผู้ดูแลระบบ",
+                color=0xE74C3C
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        bot_mark = 'X' if state["player_x"] == self.bot.user.id else 'O'
+        view = XOGameView(
+            game_id=game_id,
+            player_x=state["player_x"],
+            player_o=state["player_o"],
+            board=state["board"],
+            turn=state["turn"],
+            start_time=state["start_time"],
+            opponent=BotOpponent(bot_mark, difficulty)
+        )
+        view.play_opening()
+        shard_id = interaction.guild and interaction.guild.shard_id
+        register_game(view, shard_id)
+
+        try:
+            await persist_opening()
+            msg = await user_cache.send(self.bot, user_id, content=view.current_turn_display(), view=view)
+            view.messages = [msg]
+            await save_game_messages(game_id, [(msg.channel.id, msg.id)])
+            hand_off_messages(game_id)
+            await interaction.followup.send(embed=Embed(
+                description="✅ เกมกับบอทเริ่มแล้ว! เช็ค DM เพื่อเริ่มเล่น",
+                color=0x2ECC71
+            ), ephemeral=True)
+        except Exception:
+            log.exception("❌ Failed to send DM", extra={"game_id": game_id})
+            await interaction.followup.send(embed=Embed(
+                title="❗ ไม่สามารถส่ง DM ได้",
+                description="โปรดตรวจสอบว่าคุณเปิดรับข้อความจากสมาชิกในเซิร์ฟเวอร์",
+                color=0xE74C3C
+            ), ephemeral=True)
+
 def setup(bot):
     bot.add_cog(XO(bot))
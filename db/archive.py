@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from db.database import archive_finished_games, purge_archive, incremental_vacuum
+
+log = logging.getLogger(__name__)
+
+# เก็บ archive กี่วัน (ไม่ตั้ง = เก็บตลอดไป)
+RETENTION_DAYS = os.getenv("ARCHIVE_RETENTION_DAYS")
+
+class ArchiveCompactor:
+    """
+    งานเบื้องหลังที่รักษาให้ active_games มีแต่เกมที่ยังเล่นอยู่:
+    - ย้ายเกมที่จบแล้วแต่ยังค้างในตารางร้อนไป game_archive ทีละชุด
+    - ลบ archive ที่เก่ากว่า retention (ถ้าตั้งไว้)
+    - คืนหน้าว่างด้วย incremental vacuum ทีละนิดเพื่อไม่ให้ writer ถูกถือนาน
+    """
+
+    def __init__(self, interval: float = 300, batch_size: int = 5000, vacuum_pages: int = 1000, retention: timedelta = None):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.retention = retention
+        self._task = None
+
+    async def compact(self):
+        """
+        ทำหนึ่งรอบจนไม่มีงานค้าง คืน (จำนวนเกมที่ย้าย, จำนวนเกมที่ลบ)
+        """
+        archived = purged = 0
+        while True:
+            moved = await archive_finished_games(self.batch_size)
+            archived += moved
+            if moved < self.batch_size:
+                break
+            # ปล่อยให้งานเขียนอื่น (ตาเดิน/จบเกม) ได้ลำดับระหว่างชุด
+            await asyncio.sleep(0)
+
+        if self.retention is not None:
+            cutoff = datetime.utcnow() - self.retention
+            while True:
+                deleted = await purge_archive(cutoff, self.batch_size)
+                purged += deleted
+                if deleted < self.batch_size:
+                    break
+                await asyncio.sleep(0)
+
+        if archived or purged:
+            await incremental_vacuum(self.vacuum_pages)
+        return archived, purged
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                archived, purged = await self.compact()
+                if archived or purged:
+                    log.info("🗄️ Archived %s games, purged %s old games", archived, purged, extra={"count": archived + purged})
+            except Exception:
+                log.exception("⚠️ ข้อผิดพลาดในงาน compaction")
+            await asyncio.sleep(self.interval)
+
+# 🗄️ งาน compaction เดียวของทั้ง process
+archive_compactor = ArchiveCompactor(
+    retention=timedelta(days=int(RETENTION_DAYS)) if RETENTION_DAYS else None
+)
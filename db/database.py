@@ -1,16 +1,45 @@
 
 import aiosqlite
+import asyncio
 import datetime
+import itertools
 import os
+import random
+from metrics import DB_LATENCY, timed
 
 DB_PATH = "data/games.db"
+READER_POOL_SIZE = 4
+CACHED_STATEMENTS = 256
 
-# ✅ สร้างตารางหากยังไม่มี
-async def setup_db():
-    os.makedirs("data", exist_ok=True)
+# ⚙️ ค่า PRAGMA ที่ใช้กับทุก connection
+PRAGMAS = (
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = ON",
+)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
+# 🏊 connection pool: เขียนผ่าน writer ตัวเดียว อ่านผ่าน readers แบบวนรอบ
+_writer = None
+_readers = []
+_reader_cycle = None
+_write_lock = asyncio.Lock()
+_setup_lock = asyncio.Lock()
+
+async def _open_connection():
+    db = await aiosqlite.connect(DB_PATH, cached_statements=CACHED_STATEMENTS)
+    for pragma in PRAGMAS:
+        await db.execute(pragma)
+    return db
+
+# 🧱 migration ของ schema เรียงตามเวอร์ชัน (เก็บเวอร์ชันไว้ใน PRAGMA user_version)
+MIGRATIONS = [
+    (1, (
+        """
         CREATE TABLE IF NOT EXISTS matchmaking_queue (
             user_id INTEGER PRIMARY KEY,
             username TEXT,
@@ -18,8 +47,8 @@ async def setup_db():
             channel_id INTEGER,
             timestamp TEXT
         )
-        """)
-        await db.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS active_games (
             game_id INTEGER PRIMARY KEY AUTOINCREMENT,
             player_x_id INTEGER,
@@ -29,144 +58,546 @@ async def setup_db():
             status TEXT,
             start_time TEXT
         )
-        """)
-        await db.commit()
+        """,
+    )),
+    (2, (
+        # เกมที่ active ตามผู้เล่นแต่ละฝั่ง (is_in_game)
+        """
+        CREATE INDEX IF NOT EXISTS idx_active_games_player_x
+        ON active_games (player_x_id) WHERE status = 'active'
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_active_games_player_o
+        ON active_games (player_o_id) WHERE status = 'active'
+        """,
+        # covering index สำหรับนับเกม/ผู้เล่น และไล่เกมที่หมดเวลา
+        """
+        CREATE INDEX IF NOT EXISTS idx_active_games_start
+        ON active_games (start_time, player_x_id, player_o_id) WHERE status = 'active'
+        """,
+        # คิวเรียงตามเวลาเข้า (find_match)
+        """
+        CREATE INDEX IF NOT EXISTS idx_queue_timestamp
+        ON matchmaking_queue (timestamp, user_id, username)
+        """,
+        "ANALYZE",
+    )),
+    (3, (
+        # ข้อความ DM ของแต่ละเกม ใช้โหลดเกมกลับมาแก้ข้อความเดิมได้หลังรีสตาร์ท
+        """
+        CREATE TABLE IF NOT EXISTS game_messages (
+            game_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            PRIMARY KEY (game_id, message_id)
+        ) WITHOUT ROWID
+        """,
+        # ระดับความยากเมื่อเล่นกับบอท (NULL = ผู้เล่นสองคน)
+        "ALTER TABLE active_games ADD COLUMN bot_difficulty TEXT",
+    )),
+    (4, (
+        # ลำดับตาแบบหนึ่งไบต์ต่อตา (ดู game.game_state.encode_move) ผลเกม และเวลาจบ
+        "ALTER TABLE active_games ADD COLUMN moves BLOB NOT NULL DEFAULT x''",
+        "ALTER TABLE active_games ADD COLUMN result TEXT",
+        "ALTER TABLE active_games ADD COLUMN end_time TEXT",
+        # เกมที่จบแล้วย้ายมาที่นี่ ให้ active_games เหลือแต่เกมที่เล่นอยู่
+        """
+        CREATE TABLE IF NOT EXISTS game_archive (
+            game_id INTEGER PRIMARY KEY,
+            player_x_id INTEGER NOT NULL,
+            player_o_id INTEGER NOT NULL,
+            result TEXT,
+            start_time TEXT NOT NULL,
+            end_time TEXT,
+            bot_difficulty TEXT,
+            moves BLOB NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_game_archive_end_time
+        ON game_archive (end_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_active_games_finished
+        ON active_games (game_id) WHERE status = 'finished'
+        """,
+    )),
+    (5, (
+        # คะแนน ELO และสถิติของผู้เล่น (มีแถวเฉพาะคนที่เคยจบเกมกับผู้เล่นจริง)
+        """
+        CREATE TABLE IF NOT EXISTS player_ratings (
+            user_id INTEGER PRIMARY KEY,
+            rating INTEGER NOT NULL,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            draws INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        )
+        """,
+        # หน้าลีดเดอร์บอร์ดเดินตาม index นี้ตรงๆ ไม่ต้อง sort
+        """
+        CREATE INDEX IF NOT EXISTS idx_player_ratings_rank
+        ON player_ratings (rating DESC, user_id)
+        """,
+    )),
+    (6, (
+        # ค่าสถานะเล็กๆ ของบอท (เช่น hash ของ slash command ที่ sync ล่าสุด)
+        """
+        CREATE TABLE IF NOT EXISTS bot_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID
+        """,
+    )),
+    (7, (
+        # ข้อความกระดานของผู้ชม (/xowatch) ในห้องของ guild อยู่ตารางเดียวกับข้อความ DM ของผู้เล่น
+        # จึงถูกลบพร้อมกันตอนจบเกม
+        "ALTER TABLE game_messages ADD COLUMN spectator INTEGER NOT NULL DEFAULT 0",
+    )),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
 
-# ➕ เพิ่มผู้เล่นเข้าสู่คิว
-async def add_to_queue(user_id, username, guild_id, channel_id):
-    await setup_db()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            INSERT OR REPLACE INTO matchmaking_queue (user_id, username, guild_id, channel_id, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, username, guild_id, channel_id, datetime.datetime.utcnow().isoformat()))
+async def get_schema_version(db):
+    async with db.execute("PRAGMA user_version") as cursor:
+        row = await cursor.fetchone()
+        return row[0]
+
+# 🔁 อัปเกรดไฟล์ฐานข้อมูลเดิมทีละเวอร์ชัน แต่ละเวอร์ชันอยู่ใน transaction เดียว
+async def migrate(db, target=SCHEMA_VERSION):
+    version = await get_schema_version(db)
+    for migration_version, statements in MIGRATIONS:
+        if migration_version <= version or migration_version > target:
+            continue
+        await db.execute("BEGIN")
+        try:
+            for sql in statements:
+                await db.execute(sql)
+            await db.execute(f"PRAGMA user_version = {migration_version}")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        version = migration_version
+    return version
+
+# 🧽 เปิด auto_vacuum แบบ incremental (ไฟล์เดิมต้อง VACUUM ทั้งไฟล์หนึ่งครั้ง นอก transaction)
+async def _enable_incremental_vacuum(db):
+    async with db.execute("PRAGMA auto_vacuum") as cursor:
+        mode = (await cursor.fetchone())[0]
+    if mode != 2:
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.execute("VACUUM")
+
+# ✅ เปิด pool และสร้างตารางหากยังไม่มี (ทำครั้งเดียวต่อ process)
+async def setup_db():
+    global _writer, _readers, _reader_cycle
+    if _writer is not None:
+        return
+
+    async with _setup_lock:
+        if _writer is not None:
+            return
+
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+        writer = await _open_connection()
+        await migrate(writer)
+        await _enable_incremental_vacuum(writer)
+        _readers = [await _open_connection() for _ in range(READER_POOL_SIZE)]
+        _reader_cycle = itertools.cycle(_readers)
+        _writer = writer
+
+# 🔌 ปิด connection ทั้งหมดตอนปิดบอท
+async def close_db():
+    global _writer, _readers, _reader_cycle
+    if _writer is None:
+        return
+
+    async with _write_lock:
+        for db in _readers:
+            await db.close()
+        await _writer.close()
+        _writer, _readers, _reader_cycle = None, [], None
+
+async def _get_writer():
+    if _writer is None:
+        await setup_db()
+    return _writer
+
+async def _get_reader():
+    if _writer is None:
+        await setup_db()
+    return next(_reader_cycle)
+
+async def _fetchone(sql, params=()):
+    db = await _get_reader()
+    async with db.execute(sql, params) as cursor:
+        return await cursor.fetchone()
+
+async def _fetchall(sql, params=()):
+    db = await _get_reader()
+    async with db.execute(sql, params) as cursor:
+        return await cursor.fetchall()
+
+async def _execute_write(sql, params=()):
+    db = await _get_writer()
+    async with _write_lock:
+        cursor = await db.execute(sql, params)
         await db.commit()
+        return cursor
 
-# 🔍 ตรวจว่าผู้เล่นอยู่ในคิวไหม
-async def is_in_queue(user_id):
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT 1 FROM matchmaking_queue WHERE user_id = ?", (user_id,)) as cursor:
-            return await cursor.fetchone() is not None
+# 📈 จับเวลา helper ลง histogram xo_db_query_seconds{helper=...}
+def _timed(func):
+    return timed(DB_LATENCY, helper=func.__name__)(func)
+
+# ➕ เพิ่มผู้เล่นเข้าสู่คิว (สำเนาสำหรับกู้คืนคิวในหน่วยความจำหลังรีสตาร์ท)
+@_timed
+async def add_to_queue(user_id, username, guild_id, channel_id, timestamp=None):
+    await _execute_write("""
+        INSERT OR REPLACE INTO matchmaking_queue (user_id, username, guild_id, channel_id, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    """, (user_id, username, guild_id, channel_id, timestamp or datetime.datetime.utcnow().isoformat()))
+
+# ➖ เอาผู้เล่นออกจากคิว
+@_timed
+async def remove_from_queue(user_ids):
+    if not user_ids:
+        return
+    placeholders = ", ".join("?" * len(user_ids))
+    await _execute_write(f"DELETE FROM matchmaking_queue WHERE user_id IN ({placeholders})", tuple(user_ids))
+
+# 📋 ดึงทั้งคิวเรียงตามเวลาเข้า
+@_timed
+async def get_queue():
+    return await _fetchall("""
+        SELECT user_id, username, guild_id, channel_id, timestamp
+        FROM matchmaking_queue
+        ORDER BY timestamp ASC
+    """)
 
 # 🔍 ตรวจว่าผู้เล่นมีเกมอยู่ไหม
+@_timed
 async def is_in_game(user_id):
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("""
-            SELECT 1 FROM active_games
-            WHERE (player_x_id = ? OR player_o_id = ?) AND status = 'active'
-        """, (user_id, user_id)) as cursor:
-            return await cursor.fetchone() is not None
-
-# 🔍 ค้นหาคู่ที่ไม่ใช่ user นี้
-async def find_match(current_user_id):
-    await setup_db()
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("""
-            SELECT user_id, username FROM matchmaking_queue
-            WHERE user_id != ?
-            ORDER BY timestamp ASC
-            LIMIT 1
-        """, (current_user_id,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                await db.execute("DELETE FROM matchmaking_queue WHERE user_id IN (?, ?)", (row[0], current_user_id))
-                await db.commit()
-                return row[0]
-    return None
+    row = await _fetchone("""
+        SELECT 1 FROM active_games WHERE player_x_id = ? AND status = 'active'
+        UNION ALL
+        SELECT 1 FROM active_games WHERE player_o_id = ? AND status = 'active'
+        LIMIT 1
+    """, (user_id, user_id))
+    return row is not None
 
 # 🎮 สร้างเกมใหม่
-async def create_game(player1_id, player2_id):
-    import random
+@_timed
+async def create_game(player1_id, player2_id, bot_difficulty=None):
     if random.choice([True, False]):
         player_x, player_o = player1_id, player2_id
     else:
         player_x, player_o = player2_id, player1_id
 
-    await setup_db()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            INSERT INTO active_games (player_x_id, player_o_id, turn, board_state, status, start_time)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (player_x, player_o, 'X', '---------', 'active', datetime.datetime.utcnow().isoformat()))
-        await db.commit()
-
-        cursor = await db.execute("SELECT last_insert_rowid()")
-        row = await cursor.fetchone()
-        return row[0], (player1_id == player_x)
+    cursor = await _execute_write("""
+        INSERT INTO active_games (player_x_id, player_o_id, turn, board_state, status, start_time, bot_difficulty)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (player_x, player_o, 'X', '---------', 'active', datetime.datetime.utcnow().isoformat(), bot_difficulty))
+    return cursor.lastrowid, (player1_id == player_x)
 
 # ✏️ อัปเดตกระดาน
+@_timed
 async def update_board(game_id, new_board, next_turn):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
+    await _execute_write("""
+        UPDATE active_games
+        SET board_state = ?, turn = ?
+        WHERE game_id = ? AND status = 'active'
+    """, (new_board, next_turn, game_id))
+
+# ✏️ อัปเดตหลายกระดานใน transaction เดียว: updates = [(board, turn, moves, game_id), ...]
+@_timed
+async def update_boards(updates):
+    db = await _get_writer()
+    async with _write_lock:
+        await db.executemany("""
             UPDATE active_games
-            SET board_state = ?, turn = ?
+            SET board_state = ?, turn = ?, moves = ?
             WHERE game_id = ? AND status = 'active'
-        """, (new_board, next_turn, game_id))
+        """, updates)
         await db.commit()
 
+_STATE_COLUMNS = "player_x_id, player_o_id, board_state, turn, status, start_time, bot_difficulty, moves"
+
+def _row_to_state(row):
+    return {
+        "player_x": row[0],
+        "player_o": row[1],
+        "board": row[2],
+        "turn": row[3],
+        "status": row[4],
+        "start_time": row[5],
+        "bot_difficulty": row[6],
+        "moves": row[7]
+    }
+
 # 📥 ดึงสถานะเกม
+@_timed
 async def get_game_state(game_id):
-    async with aiosqlite.connect(DB_PATH) as db:
+    row = await _fetchone(f"""
+        SELECT {_STATE_COLUMNS}
+        FROM active_games
+        WHERE game_id = ?
+    """, (game_id,))
+    if row:
+        return _row_to_state(row)
+    return None
+
+# 📥 ดึงสถานะหลายเกมในคำสั่งเดียว → {game_id: state}
+@_timed
+async def get_game_states(game_ids):
+    if not game_ids:
+        return {}
+    placeholders = ", ".join("?" * len(game_ids))
+    rows = await _fetchall(f"""
+        SELECT {_STATE_COLUMNS}, game_id
+        FROM active_games
+        WHERE game_id IN ({placeholders})
+    """, tuple(game_ids))
+    return {row[8]: _row_to_state(row) for row in rows}
+
+# 💬 บันทึกข้อความ DM ของเกม: messages = [(channel_id, message_id), ...]
+@_timed
+async def save_game_messages(game_id, messages):
+    db = await _get_writer()
+    async with _write_lock:
+        await db.executemany("""
+            INSERT OR IGNORE INTO game_messages (game_id, channel_id, message_id)
+            VALUES (?, ?, ?)
+        """, [(game_id, channel_id, message_id) for channel_id, message_id in messages])
+        await db.commit()
+
+# 👀 บันทึกข้อความกระดานของผู้ชม หนึ่งข้อความต่อห้องต่อเกม
+# คืน message_id เดิมของห้องนั้นที่ถูกแทนที่ (หรือ None)
+@_timed
+async def save_spectator_message(game_id, channel_id, message_id):
+    db = await _get_writer()
+    async with _write_lock:
         async with db.execute("""
-            SELECT player_x_id, player_o_id, board_state, turn, status, start_time
-            FROM active_games
-            WHERE game_id = ?
-        """, (game_id,)) as cursor:
+            SELECT message_id FROM game_messages
+            WHERE game_id = ? AND channel_id = ? AND spectator = 1
+        """, (game_id, channel_id)) as cursor:
             row = await cursor.fetchone()
-            if row:
-                return {
-                    "player_x": row[0],
-                    "player_o": row[1],
-                    "board": row[2],
-                    "turn": row[3],
-                    "status": row[4],
-                    "start_time": row[5]
-                }
-    return None
+        if row:
+            await db.execute("""
+                DELETE FROM game_messages
+                WHERE game_id = ? AND channel_id = ? AND spectator = 1
+            """, (game_id, channel_id))
+        await db.execute("""
+            INSERT OR IGNORE INTO game_messages (game_id, channel_id, message_id, spectator)
+            VALUES (?, ?, ?, 1)
+        """, (game_id, channel_id, message_id))
+        await db.commit()
+        return row[0] if row else None
 
-# 🔒 จบเกม
-async def end_game(game_id):
-    async with aiosqlite.connect(DB_PATH) as db:
+# 🏁 ลบกระดานผู้ชมที่บันทึกหลังเกมจบไปแล้ว (end_game ลบข้อความของเกมไปก่อน แถวนี้จะค้างถ้าไม่ลบ)
+@_timed
+async def delete_spectator_message(game_id, channel_id, message_id):
+    db = await _get_writer()
+    async with _write_lock:
+        await db.execute("""
+            DELETE FROM game_messages
+            WHERE game_id = ? AND channel_id = ? AND message_id = ? AND spectator = 1
+        """, (game_id, channel_id, message_id))
+        await db.commit()
+
+@_timed
+async def count_spectator_messages(game_id):
+    row = await _fetchone("""
+        SELECT COUNT(*) FROM game_messages
+        WHERE game_id = ? AND spectator = 1
+    """, (game_id,))
+    return row[0]
+
+# 💬 ดึงข้อความของหลายเกม → {game_id: [(channel_id, message_id, spectator), ...]}
+# spectator = 1 คือข้อความของผู้ชมในห้องของ guild, 0 คือข้อความ DM ของผู้เล่น
+@_timed
+async def get_game_messages(game_ids):
+    if not game_ids:
+        return {}
+    placeholders = ", ".join("?" * len(game_ids))
+    rows = await _fetchall(f"""
+        SELECT game_id, channel_id, message_id, spectator FROM game_messages
+        WHERE game_id IN ({placeholders})
+    """, tuple(game_ids))
+    messages = {}
+    for game_id, channel_id, message_id, spectator in rows:
+        messages.setdefault(game_id, []).append((channel_id, message_id, spectator))
+    return messages
+
+# 📦 SQL ย้ายเกมที่จบแล้วไป game_archive (ใช้ทั้งตอนจบเกมและงาน compaction)
+# เกมเก่าที่ไม่มี end_time ใช้ start_time แทน เพื่อให้ retention ลบได้
+_ARCHIVE_SELECT = """
+    INSERT OR REPLACE INTO game_archive
+        (game_id, player_x_id, player_o_id, result, start_time, end_time, bot_difficulty, moves)
+    SELECT game_id, player_x_id, player_o_id, result, start_time, COALESCE(end_time, start_time), bot_difficulty, moves
+    FROM active_games
+"""
+
+# 🔒 จบเกม: บันทึกผลแล้วย้ายไป game_archive ใน transaction เดียว
+# result: 'X' / 'O' / 'draw' / 'timeout'
+@_timed
+async def end_game(game_id, result=None):
+    db = await _get_writer()
+    async with _write_lock:
         await db.execute("""
             UPDATE active_games
-            SET status = 'finished'
+            SET status = 'finished', result = ?, end_time = ?
             WHERE game_id = ?
-        """, (game_id,))
+        """, (result, datetime.datetime.utcnow().isoformat(), game_id))
+        await db.execute(_ARCHIVE_SELECT + "WHERE game_id = ? AND status = 'finished'", (game_id,))
+        await db.execute("DELETE FROM active_games WHERE game_id = ? AND status = 'finished'", (game_id,))
+        await db.execute("DELETE FROM game_messages WHERE game_id = ?", (game_id,))
         await db.commit()
 
-# 📊 นับจำนวนเกมที่กำลังดำเนินอยู่
-async def count_active_games():
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("SELECT COUNT(*) FROM active_games WHERE status = 'active'") as cursor:
-            row = await cursor.fetchone()
-            return row[0]
-
-# 👥 นับจำนวนผู้เล่นที่กำลังเล่นอยู่
-async def count_active_players():
-    async with aiosqlite.connect(DB_PATH) as db:
+# 📦 ย้ายเกมที่จบแล้วแต่ยังค้างใน active_games (ข้อมูลก่อนมี archive) ทีละชุด
+# คืนจำนวนเกมที่ย้าย
+@_timed
+async def archive_finished_games(batch_size=5000):
+    db = await _get_writer()
+    async with _write_lock:
         async with db.execute("""
-            SELECT COUNT(DISTINCT player_x_id || player_o_id)
-            FROM active_games
-            WHERE status = 'active'
-        """) as cursor:
-            row = await cursor.fetchone()
-            return row[0]
+            SELECT game_id FROM active_games
+            WHERE status = 'finished'
+            LIMIT ?
+        """, (batch_size,)) as cursor:
+            game_ids = [row[0] for row in await cursor.fetchall()]
+        if not game_ids:
+            return 0
+        placeholders = ", ".join("?" * len(game_ids))
+        await db.execute(_ARCHIVE_SELECT + f"WHERE game_id IN ({placeholders})", game_ids)
+        await db.execute(f"DELETE FROM active_games WHERE game_id IN ({placeholders})", game_ids)
+        await db.execute(f"DELETE FROM game_messages WHERE game_id IN ({placeholders})", game_ids)
+        await db.commit()
+        return len(game_ids)
+
+# 🗑️ ลบเกมใน archive ที่จบก่อน cutoff ทีละชุด คืนจำนวนที่ลบ
+@_timed
+async def purge_archive(cutoff, batch_size=5000):
+    cursor = await _execute_write("""
+        DELETE FROM game_archive
+        WHERE game_id IN (
+            SELECT game_id FROM game_archive
+            WHERE end_time < ?
+            LIMIT ?
+        )
+    """, (cutoff.isoformat(), batch_size))
+    return cursor.rowcount
+
+# 🧽 คืนหน้าว่างให้ระบบไฟล์ทีละไม่เกิน pages หน้า
+@_timed
+async def incremental_vacuum(pages=1000):
+    db = await _get_writer()
+    async with _write_lock:
+        await db.execute(f"PRAGMA incremental_vacuum({int(pages)})")
+        await db.commit()
+
+# 📜 ดึงเกมจาก archive (ใช้ replay ด้วย game.game_state.replay_moves)
+@_timed
+async def get_archived_game(game_id):
+    row = await _fetchone("""
+        SELECT player_x_id, player_o_id, result, start_time, end_time, bot_difficulty, moves
+        FROM game_archive
+        WHERE game_id = ?
+    """, (game_id,))
+    if row:
+        return {
+            "player_x": row[0],
+            "player_o": row[1],
+            "result": row[2],
+            "start_time": row[3],
+            "end_time": row[4],
+            "bot_difficulty": row[5],
+            "moves": row[6]
+        }
+    return None
+
+# 🏆 คะแนนของผู้เล่นหลายคน → {user_id: (rating, wins, losses, draws)}
+@_timed
+async def get_ratings(user_ids):
+    if not user_ids:
+        return {}
+    placeholders = ", ".join("?" * len(user_ids))
+    rows = await _fetchall(f"""
+        SELECT user_id, rating, wins, losses, draws
+        FROM player_ratings
+        WHERE user_id IN ({placeholders})
+    """, tuple(user_ids))
+    return {row[0]: row[1:] for row in rows}
+
+# 🏆 บันทึกคะแนนหลายคนใน transaction เดียว: rows = [(user_id, rating, wins, losses, draws), ...]
+@_timed
+async def save_ratings(rows):
+    now = datetime.datetime.utcnow().isoformat()
+    db = await _get_writer()
+    async with _write_lock:
+        await db.executemany("""
+            INSERT INTO player_ratings (user_id, rating, wins, losses, draws, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id) DO UPDATE SET
+                rating = excluded.rating,
+                wins = excluded.wins,
+                losses = excluded.losses,
+                draws = excluded.draws,
+                updated_at = excluded.updated_at
+        """, [(*row, now) for row in rows])
+        await db.commit()
+
+# 📊 จำนวนผู้เล่นต่อคะแนน (ใช้สร้างตารางอันดับในหน่วยความจำตอนเริ่มบอท)
+@_timed
+async def get_rating_histogram():
+    return await _fetchall("""
+        SELECT rating, COUNT(*) FROM player_ratings
+        GROUP BY rating
+    """)
+
+# 📄 หน้าลีดเดอร์บอร์ด: เริ่มที่คะแนน <= max_rating แล้วข้ามไป offset แถว (offset อยู่ในกลุ่มคะแนนเท่ากันเท่านั้น)
+@_timed
+async def get_leaderboard_page(max_rating, limit, offset=0):
+    return await _fetchall("""
+        SELECT user_id, rating, wins, losses, draws
+        FROM player_ratings
+        WHERE rating <= ?
+        ORDER BY rating DESC, user_id
+        LIMIT ? OFFSET ?
+    """, (max_rating, limit, offset))
+
+# 🗝️ อ่าน/เขียนค่าใน bot_meta
+@_timed
+async def get_meta(key):
+    row = await _fetchone("SELECT value FROM bot_meta WHERE key = ?", (key,))
+    return row[0] if row else None
+
+@_timed
+async def set_meta(key, value):
+    await _execute_write("""
+        INSERT INTO bot_meta (key, value) VALUES (?, ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+    """, (key, value))
+
+# 👥 เกมที่ active พร้อมผู้เล่นทั้งสองฝั่ง (ใช้สร้างตัวนับ /status ตอนเริ่มบอท)
+@_timed
+async def get_active_game_players():
+    return await _fetchall("""
+        SELECT game_id, player_x_id, player_o_id FROM active_games
+        WHERE status = 'active'
+        ORDER BY start_time
+    """)
 
 # ⏰ ดึงเกมทั้งหมดที่ active
+@_timed
 async def get_all_active_games():
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute("""
-            SELECT game_id, start_time FROM active_games
-            WHERE status = 'active'
-        """) as cursor:
-            return await cursor.fetchall()
+    return await _fetchall("""
+        SELECT game_id, start_time FROM active_games
+        WHERE status = 'active'
+        ORDER BY start_time
+    """)
 
 # ❌ หมดเวลาเกม
+@_timed
 async def expire_game(game_id):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            UPDATE active_games
-            SET status = 'finished'
-            WHERE game_id = ?
-        """, (game_id,))
-        await db.commit()
+    await end_game(game_id, 'timeout')
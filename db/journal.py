@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from db.database import update_boards
+
+log = logging.getLogger(__name__)
+
+class MoveJournal:
+    """
+    write-behind ของกระดาน: handle_move บันทึกลงหน่วยความจำทันที
+    แล้วค่อยเขียนลง SQLite เป็นชุดใน transaction เดียว ทุก `interval` วินาที
+    หรือเมื่อมีเกมค้างเขียนครบ `max_pending` เกม
+    หลายตาของเกมเดียวกันที่ยังไม่ได้เขียนจะถูกรวมเหลือสถานะล่าสุด
+    (ถ้า process ตายกะทันหัน ตาที่ยังไม่ flush จะหายไปได้สูงสุด `interval` วินาที)
+    """
+
+    def __init__(self, interval: float = 0.5, max_pending: int = 256):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._inflight = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    # สถานะล่าสุดที่ยังไม่ได้เขียนลง DB → (board, turn, moves) หรือ None
+    def pending(self, game_id: int):
+        return self._pending.get(game_id) or self._inflight.get(game_id)
+
+    def record(self, game_id: int, board: str, turn: str, moves: bytes):
+        self._pending[game_id] = (board, turn, moves)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            try:
+                await update_boards([(board, turn, moves, game_id) for game_id, (board, turn, moves) in batch.items()])
+            except Exception:
+                # คืนรายการที่เขียนไม่สำเร็จ โดยไม่ทับตาที่ใหม่กว่า
+                for game_id, state in batch.items():
+                    self._pending.setdefault(game_id, state)
+                log.exception("❌ เขียนกระดาน %s เกมไม่สำเร็จ", len(batch), extra={"count": len(batch)})
+            finally:
+                self._inflight = {}
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    # 🔌 หยุด loop แล้วเขียนที่ค้างอยู่ทั้งหมด (เรียกตอนปิดบอท)
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+# 📝 journal เดียวของทั้ง process
+move_journal = MoveJournal()
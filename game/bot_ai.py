@@ -0,0 +1,70 @@
+import random
+from game.game_state import BitBoard
+
+DIFFICULTIES = {
+    "easy": 0.0,     # เดินสุ่มทั้งหมด
+    "medium": 0.6,   # เดินดีที่สุด 60% ของตา
+    "hard": 1.0,     # เดินสมบูรณ์แบบทุกตา
+}
+
+class PerfectPlayTable:
+    """
+    แก้เกม XO 3x3 ทั้งเกมครั้งเดียว (negamax + memo) แล้วเก็บทุกตำแหน่งที่เกิดขึ้นได้
+    (x, o) → (คะแนนของฝ่ายที่กำลังจะเดิน, ช่องที่ดีที่สุด)
+    คะแนน > 0 คือชนะ (ยิ่งมากยิ่งชนะเร็ว), 0 คือเสมอ, < 0 คือแพ้
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self._solve(0, 0)
+
+    def _solve(self, x: int, o: int):
+        key = (x, o)
+        if key in self.positions:
+            return self.positions[key][0]
+
+        board = BitBoard(3, 3, x, o)
+        empties = len(board.legal_moves())
+        if board.winner() is not None:
+            # ตาที่แล้วจบเกมไปแล้ว ฝ่ายที่จะเดินต่อจึงแพ้หรือเสมอ
+            score = 0 if board.winner() == 'draw' else -(1 + empties)
+            self.positions[key] = (score, ())
+            return score
+
+        x_to_move = bin(x).count("1") == bin(o).count("1")
+        best_score, best_moves = None, []
+        for idx in board.legal_moves():
+            bit = 1 << idx
+            if x_to_move:
+                score = -self._solve(x | bit, o)
+            else:
+                score = -self._solve(x, o | bit)
+            if best_score is None or score > best_score:
+                best_score, best_moves = score, [idx]
+            elif score == best_score:
+                best_moves.append(idx)
+
+        self.positions[key] = (best_score, tuple(best_moves))
+        return best_score
+
+    def best_moves(self, board: BitBoard):
+        return self.positions[(board.x, board.o)][1]
+
+class BotOpponent:
+    """
+    ฝ่ายบอทในเกม XOGameView: ตอบจากตารางที่แก้ไว้แล้ว ไม่มีการค้นหาใหม่ตอนกดปุ่ม
+    """
+
+    def __init__(self, mark: str, difficulty: str = "hard", rng: random.Random = None):
+        self.mark = mark
+        self.difficulty = difficulty
+        self.accuracy = DIFFICULTIES[difficulty]
+        self.rng = rng or random.Random()
+
+    def choose(self, board: BitBoard) -> int:
+        if self.rng.random() < self.accuracy:
+            return self.rng.choice(solved_positions.best_moves(board))
+        return self.rng.choice(board.legal_moves())
+
+# 🧠 ตารางเดียวของทั้ง process สร้างตอน import (ประมาณ 5,500 ตำแหน่ง)
+solved_positions = PerfectPlayTable()
@@ -0,0 +1,383 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+from datetime import datetime
+import game.matchmaking as matchmaking
+from db.journal import move_journal
+from game.matchmaking import Ticket
+from game.scheduler import game_timeouts
+from game.registry import live_games
+from game.counters import live_counters
+from game.ratings import leaderboard
+
+log = logging.getLogger(__name__)
+
+CLUSTER_HOST = os.getenv("CLUSTER_HOST", "127.0.0.1")
+CLUSTER_PORT = int(os.getenv("CLUSTER_PORT", "8765"))
+# ข้อความ DM ทุกข้อความ (รวมปุ่ม XO) ถูกส่งมาที่ shard 0 เสมอ worker ที่ถือ shard 0 จึงเป็นเจ้าของเกม
+DM_SHARD = 0
+
+def parse_shard_ids(text: str):
+    """
+    "0-3" → [0, 1, 2, 3], "4,6" → [4, 6], ว่าง → None (ให้ nextcord เลือกเองทั้งหมด)
+    """
+    if not text:
+        return None
+    shard_ids = []
+    for part in text.split(","):
+        start, _, end = part.partition("-")
+        shard_ids.extend(range(int(start), int(end or start) + 1))
+    return shard_ids
+
+def split_shards(shard_count: int, workers: int):
+    """
+    แบ่ง shard 0..shard_count-1 เป็นช่วงติดกัน workers ช่วง (ช่วงแรกๆ ได้มากกว่าหนึ่งตัวถ้าหารไม่ลงตัว)
+    """
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for cluster_id in range(workers):
+        end = start + size + (cluster_id < extra)
+        ranges.append(range(start, end))
+        start = end
+    return ranges
+
+def ticket_to_dict(ticket: Ticket):
+    return {
+        "user_id": ticket.user_id,
+        "username": ticket.username,
+        "guild_id": ticket.guild_id,
+        "channel_id": ticket.channel_id,
+        "rating": ticket.rating,
+        "joined_at": ticket.joined_at.isoformat()
+    }
+
+def ticket_from_dict(data):
+    return Ticket(data["user_id"], data["username"], data["guild_id"], data["channel_id"],
+                  data["rating"], datetime.fromisoformat(data["joined_at"]))
+
+# 📊 สถิติของ process นี้ที่ส่งให้ coordinator รวม
+def local_snapshot():
+    return {
+        "active_games": live_counters.active_games,
+        "active_players": live_counters.active_players,
+        "shards": list(live_counters.games_by_shard().items()),
+        "started": live_counters.started.total(),
+        "finished": live_counters.finished.total()
+    }
+
+async def _write(writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+class ClusterCoordinator:
+    """
+    ตัวกลางของทุก worker (รันใน launcher.py) คุยกันด้วย JSON ทีละบรรทัดผ่าน TCP บน localhost
+    - ถือ Matchmaker ตัวเดียวของทั้ง cluster การจับคู่จึงยัง atomic แม้ผู้เล่นอยู่คนละ process
+    - รวมสถิติของทุก worker ให้ /status
+    - ส่งต่อ event ระหว่าง worker (เกมใหม่ → เจ้าของเกม, คะแนนเปลี่ยน → ทุกคน)
+    """
+
+    def __init__(self, matchmaker=None, host: str = CLUSTER_HOST, port: int = CLUSTER_PORT):
+        self.matchmaker = matchmaker or matchmaking.matchmaker
+        self.host = host
+        self.port = port
+        self._workers = {}
+        self._reports = {}
+        self._pairing = {}
+        self._server = None
+        # event loop เก็บ task แค่ weak reference: ถือไว้จนกว่าจะจบ
+        self._handling = set()
+
+    async def start(self):
+        self.matchmaker.start()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+
+    async def close(self):
+        self.matchmaker.stop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def stats(self):
+        shards = {}
+        for report in self._reports.values():
+            for shard_id, count in report["shards"]:
+                shards[shard_id] = shards.get(shard_id, 0) + count
+        reports = self._reports.values()
+        # ผู้เล่นหนึ่งคนมีได้เกมเดียว เกมหนึ่งอยู่ใน worker เดียว → รวมกันได้ตรงๆ
+        return {
+            "active_games": sum(report["active_games"] for report in reports),
+            "active_players": sum(report["active_players"] for report in reports),
+            "shards": list(shards.items()),
+            "started": sum(report["started"] for report in reports),
+            "finished": sum(report["finished"] for report in reports),
+            "queued": len(self.matchmaker),
+            "workers": len(self._workers)
+        }
+
+    async def _serve(self, reader, writer):
+        hello = json.loads(await reader.readline())
+        cluster_id = hello["cluster_id"]
+        self._workers[cluster_id] = (writer, set(hello["shard_ids"] or ()))
+        self._pairing[cluster_id] = set()
+        log.info("🔗 Worker %s connected (shards %s)", cluster_id, hello["shard_ids"], extra={"cluster_id": cluster_id})
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._handle(cluster_id, writer, json.loads(line)))
+                self._handling.add(task)
+                task.add_done_callback(self._handling.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            log.warning("🔌 Worker %s disconnected", cluster_id, extra={"cluster_id": cluster_id})
+            if self._workers.get(cluster_id, (None,))[0] is writer:
+                del self._workers[cluster_id]
+                self._reports.pop(cluster_id, None)
+                # คู่ที่ worker นี้กำลังสร้างเกมให้ค้างอยู่ → ปล่อยให้เข้าคิวใหม่ได้
+                self.matchmaker.release(*self._pairing.pop(cluster_id, ()))
+            writer.close()
+
+    async def _handle(self, cluster_id, writer, message):
+        try:
+            result = await self._dispatch(cluster_id, message)
+            reply = {"id": message.get("id"), "result": result}
+        except Exception as e:
+            log.exception("⚠️ ข้อผิดพลาดใน cluster op %s", message.get("op"), extra={"cluster_id": cluster_id})
+            reply = {"id": message.get("id"), "error": str(e)}
+        if message.get("id") is not None:
+            await _write(writer, reply)
+
+    async def _dispatch(self, cluster_id, message):
+        op = message["op"]
+        if op == "mm_join":
+            opponent = await self.matchmaker.join(ticket_from_dict(message["ticket"]))
+            if opponent is None:
+                return None
+            self._pairing[cluster_id].update((message["ticket"]["user_id"], opponent.user_id))
+            return ticket_to_dict(opponent)
+        if op == "mm_leave":
+            return await self.matchmaker.leave(message["user_id"])
+        if op == "mm_release":
+            self.matchmaker.release(*message["user_ids"])
+            self._pairing[cluster_id].difference_update(message["user_ids"])
+            return None
+        if op == "mm_busy":
+            return self.matchmaker.is_busy(message["user_id"])
+        if op == "report":
+            self._reports[cluster_id] = message["snapshot"]
+            return None
+        if op == "stats":
+            self._reports[cluster_id] = message["snapshot"]
+            return self.stats()
+        if op == "publish":
+            await self._publish(cluster_id, message["target"], message["event"], message["data"])
+            return None
+        raise ValueError(f"unknown op {op}")
+
+    async def _publish(self, sender, target, event, data):
+        if target == "owner":
+            targets = [writer for writer, shard_ids in self._workers.values() if DM_SHARD in shard_ids]
+        else:
+            targets = [writer for cluster_id, (writer, _) in self._workers.items() if cluster_id != sender]
+        for writer in targets:
+            await _write(writer, {"event": event, "data": data})
+
+class ClusterLink:
+    """
+    ฝั่ง worker ของ ClusterCoordinator: request() รอคำตอบ, send() ส่งแล้วไม่รอ, on() รับ event
+    """
+
+    def __init__(self, cluster_id: int, shard_ids, host: str = CLUSTER_HOST, port: int = CLUSTER_PORT,
+                 report_every: float = 10.0):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.host = host
+        self.port = port
+        self.report_every = report_every
+        self._ids = itertools.count()
+        self._replies = {}
+        self._handlers = {}
+        self._writer = None
+        self._tasks = []
+
+    def owns_games(self):
+        return self.shard_ids is None or DM_SHARD in self.shard_ids
+
+    async def connect(self, retries: int = 20):
+        for attempt in range(retries):
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                break
+            except OSError:
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(0.5)
+        await _write(self._writer, {"op": "hello", "cluster_id": self.cluster_id, "shard_ids": self.shard_ids})
+        self._tasks = [asyncio.create_task(self._read(reader)), asyncio.create_task(self._report())]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def on(self, event: str, handler):
+        self._handlers[event] = handler
+
+    def send(self, op: str, **data):
+        self._writer.write(json.dumps({"op": op, **data}).encode() + b"\n")
+
+    async def request(self, op: str, timeout: float = 5.0, **data):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._replies[request_id] = future
+        try:
+            await _write(self._writer, {"op": op, "id": request_id, **data})
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._replies.pop(request_id, None)
+
+    def publish(self, target: str, event: str, **data):
+        self.send("publish", target=target, event=event, data=data)
+
+    async def stats(self):
+        return await self.request("stats", snapshot=local_snapshot())
+
+    async def _read(self, reader):
+        while line := await reader.readline():
+            message = json.loads(line)
+            if "event" in message:
+                handler = self._handlers.get(message["event"])
+                if handler is not None:
+                    try:
+                        result = handler(**message["data"])
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception:
+                        log.exception("⚠️ ข้อผิดพลาดใน cluster event %s", message["event"])
+                continue
+            future = self._replies.get(message["id"])
+            if future is None or future.done():
+                continue
+            if "error" in message:
+                future.set_exception(RuntimeError(message["error"]))
+            else:
+                future.set_result(message["result"])
+        log.error("❌ Lost connection to cluster coordinator")
+        for future in self._replies.values():
+            if not future.done():
+                future.set_exception(ConnectionError("cluster coordinator disconnected"))
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            try:
+                self.send("report", snapshot=local_snapshot())
+            except Exception as e:
+                log.warning("⚠️ ส่งสถิติให้ coordinator ไม่สำเร็จ: %s", e)
+
+class RemoteMatchmaker:
+    """
+    หน้าตาเดียวกับ Matchmaker ที่ cogs ใช้ แต่ส่งทุกอย่างไปที่คิวกลางของ coordinator
+    (coordinator เป็นคนล้างคิวที่รอนาน worker จึงไม่มีงานเบื้องหลัง)
+    ไม่มี len(): ขนาดคิวอยู่ที่ coordinator ดูผ่าน cluster_stats()
+    """
+
+    def __init__(self, link: ClusterLink):
+        self.link = link
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    async def check_busy(self, user_id: int):
+        return await self.link.request("mm_busy", user_id=user_id)
+
+    async def join(self, joiner: Ticket):
+        opponent = await self.link.request("mm_join", ticket=ticket_to_dict(joiner))
+        return ticket_from_dict(opponent) if opponent else None
+
+    async def leave(self, user_id: int):
+        return await self.link.request("mm_leave", user_id=user_id)
+
+    def release(self, *user_ids):
+        self.link.send("mm_release", user_ids=list(user_ids))
+
+# 🔗 การเชื่อมต่อกับ coordinator (None = รันแบบ process เดียว)
+link = None
+
+def owns_games():
+    return link is None or link.owns_games()
+
+async def cluster_stats():
+    """
+    สถิติรวมของทั้ง cluster (หรือของ process นี้ถ้าไม่ได้รันแบบ cluster)
+    """
+    if link is None:
+        return {**local_snapshot(), "queued": len(matchmaking.matchmaker), "workers": 1}
+    return await link.stats()
+
+# 🎮 ลงทะเบียนเกมที่เพิ่งสร้าง: ถ้า process นี้เป็นเจ้าของเกมก็เก็บไว้เลย
+# worker อื่นแจ้งเจ้าของทันทีก่อนเรียก REST ใด ๆ ถ้าส่ง DM ล้มเกมก็ยังหมดเวลาตามปกติ ไม่ค้างผู้เล่นไว้
+def register_game(view, shard_id):
+    if not owns_games():
+        link.publish("owner", "game_started", game_id=view.game_id, start_time=view.start_time.isoformat(),
+                     players=view.human_players(), shard_id=shard_id)
+        return
+    live_games.add(view)
+    game_timeouts.schedule(view.game_id, view.start_time)
+    live_counters.game_started(view.game_id, view.human_players(), shard_id)
+
+# 🤖 ตาแรกของบอท (xobot) ต้องอยู่ใน DB ก่อนส่ง DM: ปุ่มใน DM ไปที่เจ้าของเกมซึ่งโหลดกระดานจาก DB
+# ถ้าเขียนหลังส่ง DM คลิกแรกอาจมาถึงก่อนแล้วได้กระดานที่ไม่มีตาของบอท
+async def persist_opening():
+    if owns_games():
+        return
+    await move_journal.flush()
+
+# 📨 worker อื่นแจ้งเจ้าของเมื่อบันทึกข้อความ DM แล้ว (ปุ่มใน DM จะไปที่เจ้าของเสมอ)
+def hand_off_messages(game_id):
+    if owns_games():
+        return
+    link.publish("owner", "game_messages_saved", game_id=game_id)
+
+# 👀 ข้อความผู้ชมที่สร้างบน worker อื่นต้องแจ้งเจ้าของเกม (ผู้กระจายการอัปเดต ดู cogs/spectate.py)
+def hand_off_spectator(game_id, message):
+    if owns_games():
+        return
+    link.publish("owner", "spectator_added", game_id=game_id, channel_id=message.channel.id, message_id=message.id)
+
+def _on_game_started(game_id, start_time, players, shard_id):
+    game_timeouts.schedule(game_id, datetime.fromisoformat(start_time))
+    live_counters.game_started(game_id, players, shard_id)
+
+def _on_game_messages_saved(game_id):
+    # ถ้ามีคนกดปุ่มก่อนข้อความถูกบันทึก view ที่โหลดไว้จะไม่มีข้อความ DM → ทิ้งแล้วโหลดใหม่ตอนกดครั้งถัดไป
+    view = live_games.get(game_id)
+    if view is not None and not view.messages and not view.lock.locked():
+        live_games.remove(game_id)
+
+def _on_ratings_changed(changes):
+    leaderboard.apply_changes(changes)
+
+async def join_cluster(cluster_id: int, shard_ids):
+    """
+    เชื่อมต่อ coordinator แล้วสลับ matchmaker ของ process นี้เป็นคิวกลาง
+    ต้องเรียกก่อนโหลด cogs
+    """
+    global link
+    link = ClusterLink(cluster_id, shard_ids)
+    await link.connect()
+    matchmaking.matchmaker = RemoteMatchmaker(link)
+    link.on("game_started", _on_game_started)
+    link.on("game_messages_saved", _on_game_messages_saved)
+    link.on("ratings_changed", _on_ratings_changed)
+    leaderboard.listeners.append(lambda changes: link.publish("others", "ratings_changed", changes=changes))
+    return link
@@ -0,0 +1,89 @@
+import time
+from collections import Counter
+from db.database import get_active_game_players
+
+class RateWindow:
+    """
+    นับเหตุการณ์ย้อนหลัง `seconds` วินาทีด้วยวงแหวนถังละหนึ่งวินาที (บวก/อ่านเป็น O(1) ต่อถัง)
+    """
+
+    def __init__(self, seconds: int = 60):
+        self.seconds = seconds
+        self._buckets = [0] * seconds
+        self._stamps = [0] * seconds
+
+    def add(self, now: float = None):
+        second = int(now if now is not None else time.time())
+        slot = second % self.seconds
+        if self._stamps[slot] != second:
+            self._stamps[slot] = second
+            self._buckets[slot] = 0
+        self._buckets[slot] += 1
+
+    def total(self, now: float = None):
+        second = int(now if now is not None else time.time())
+        oldest = second - self.seconds
+        return sum(count for count, stamp in zip(self._buckets, self._stamps) if stamp > oldest)
+
+class LiveCounters:
+    """
+    ตัวนับสถานะระบบที่อัปเดตตอนสร้าง/จบเกม ให้ /status ตอบได้โดยไม่ต้องแตะ DB
+    - active_games / active_players: จำนวนเกมและผู้เล่น (ไม่ซ้ำ ไม่นับบัญชีบอทในเกม /xobot) ที่กำลังเล่น
+    - started / finished: จำนวนเกมที่เริ่ม/จบใน 60 วินาทีล่าสุด
+    - แยกจำนวนเกมตาม shard ที่เริ่มเกม (เกมที่โหลดจาก DB ตอนเริ่มบอทไม่รู้ shard → None)
+    """
+
+    def __init__(self):
+        self._games = {}
+        self._players = Counter()
+        self._shards = Counter()
+        self.started = RateWindow()
+        self.finished = RateWindow()
+
+    @property
+    def active_games(self):
+        return len(self._games)
+
+    @property
+    def active_players(self):
+        return len(self._players)
+
+    def games_by_shard(self):
+        return dict(self._shards)
+
+    # players: id ของผู้เล่นที่เป็นคน (เกมกับบอทมีคนเดียว)
+    def _track(self, game_id: int, players, shard_id):
+        if game_id in self._games:
+            return False
+        players = tuple(players)
+        self._games[game_id] = (players, shard_id)
+        self._players.update(players)
+        self._shards[shard_id] += 1
+        return True
+
+    def game_started(self, game_id: int, players, shard_id=None):
+        if self._track(game_id, players, shard_id):
+            self.started.add()
+
+    def game_finished(self, game_id: int):
+        game = self._games.pop(game_id, None)
+        if game is None:
+            return
+        players, shard_id = game
+        self._players.subtract(players)
+        for player_id in players:
+            if self._players[player_id] <= 0:
+                del self._players[player_id]
+        self._shards[shard_id] -= 1
+        if self._shards[shard_id] <= 0:
+            del self._shards[shard_id]
+        self.finished.add()
+
+    # 🔁 โหลดเกมที่ active จาก DB ตอนเริ่มบอท (รวมกับเกมที่นับไว้แล้ว ไม่นับซ้ำ)
+    # bot_user_id: บัญชีบอทเป็นผู้เล่นในแถวของเกม /xobot ต้องตัดออก
+    async def rebuild(self, bot_user_id: int = None):
+        for game_id, player_x, player_o in await get_active_game_players():
+            self._track(game_id, [player_id for player_id in (player_x, player_o) if player_id != bot_user_id], None)
+
+# 📊 ตัวนับเดียวของทั้ง process
+live_counters = LiveCounters()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from metrics import REST_EDIT
+
+log = logging.getLogger(__name__)
+
+class RateBucket:
+    """
+    token bucket ต่อช่องแชต: แก้ข้อความได้ `rate` ครั้งต่อ `per` วินาที
+    """
+
+    def __init__(self, rate: int = 5, per: float = 5.0):
+        self.capacity = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / self.per)
+        self.updated = now
+
+    def is_idle(self):
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.per / self.capacity)
+
+class MessageFanout:
+    """
+    กระจายการแก้ข้อความของเกมไปหลายข้อความพร้อมกัน
+    - ข้อความละหนึ่ง worker: ระหว่างที่กำลังแก้อยู่ คำขอใหม่จะทับคำขอที่รอ (ใช้สถานะล่าสุด)
+    - ทุกการแก้ต้องผ่าน RateBucket ของช่องแชตนั้นก่อน
+    - concurrency: จำนวนการแก้ที่วิ่งพร้อมกันได้สูงสุด (None = ไม่จำกัด)
+    """
+
+    def __init__(self, rate: int = 5, per: float = 5.0, max_buckets: int = 10_000,
+                 concurrency: int = None, kind: str = "message"):
+        self.rate = rate
+        self.per = per
+        self.max_buckets = max_buckets
+        self.kind = kind
+        self._slots = asyncio.Semaphore(concurrency) if concurrency else None
+        self._latest = {}
+        self._workers = {}
+        self._buckets = {}
+
+    def _bucket(self, channel_id: int):
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                # ทิ้ง bucket ที่เต็มแล้ว (ไม่มีการแก้ล่าสุด) เพื่อไม่ให้ dict โตไม่สิ้นสุด
+                for key in [key for key, value in self._buckets.items() if value.is_idle()]:
+                    del self._buckets[key]
+            bucket = self._buckets[channel_id] = RateBucket(self.rate, self.per)
+        return bucket
+
+    def __len__(self):
+        return len(self._latest)
+
+    def submit(self, message, **fields):
+        self._latest[message.id] = (message, fields)
+        task = self._workers.get(message.id)
+        if task is None or task.done():
+            task = self._workers[message.id] = asyncio.create_task(self._drain(message.id))
+        return task
+
+    async def _drain(self, message_id: int):
+        try:
+            while message_id in self._latest:
+                message, fields = self._latest.pop(message_id)
+                await self._bucket(message.channel.id).acquire()
+                try:
+                    if self._slots is None:
+                        await self._edit(message_id, message, fields)
+                    else:
+                        async with self._slots:
+                            await self._edit(message_id, message, fields)
+                except Exception as e:
+                    log.warning("❌ แก้ข้อความ %s ไม่สำเร็จ: %s", message_id, e, extra={"message_id": message_id})
+        finally:
+            if self._workers.get(message_id) is asyncio.current_task():
+                del self._workers[message_id]
+
+    async def _edit(self, message_id: int, message, fields):
+        # ระหว่างรอ bucket/คิว อาจมีสถานะใหม่กว่าเข้ามา ใช้อันล่าสุดแทนการแก้ซ้ำสองครั้ง
+        if message_id in self._latest:
+            message, fields = self._latest.pop(message_id)
+        with REST_EDIT.time(kind=self.kind):
+            await message.edit(**fields)
+
+    # ✉️ แก้ทุกข้อความพร้อมกัน ข้ามข้อความที่ interaction แก้ไปแล้ว
+    # (ยกเว้นมีการแก้เก่าค้างอยู่ ต้องแก้ซ้ำด้วยสถานะล่าสุดไม่ให้ของเก่าทับ)
+    async def edit_all(self, messages, skip=None, **fields):
+        skip_id = skip.id if skip is not None else None
+        tasks = [
+            self.submit(msg, **fields)
+            for msg in messages
+            if msg.id != skip_id or msg.id in self._workers
+        ]
+        if tasks:
+            # shield: ถ้าผู้เรียกถูกยกเลิก worker ที่ใช้ร่วมกันยังทำงานต่อ
+            await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+
+# 📣 fan-out เดียวของทั้ง process
+message_fanout = MessageFanout()
+
+# 👀 fan-out ของกระดานผู้ชม แยก bucket และคิวจากของผู้เล่น
+# ห้องละหนึ่งการแก้ต่อ 3 วินาที และแก้พร้อมกันทั้ง process ไม่เกิน 4 ข้อความ
+# ไม่ให้เกมที่มีผู้ชมหลายร้อยห้องกิน rate limit รวมของบอทจนข้อความของผู้เล่นช้า
+spectator_fanout = MessageFanout(rate=1, per=3.0, concurrency=4, kind="spectator")
@@ -1,23 +1,187 @@
-def check_winner(board: str):
+from functools import lru_cache
+from itertools import product
+from math import isqrt
+
+# จำนวนที่ต้องเรียงติดกันเพื่อชนะ ตามขนาดกระดาน (เช่น 5x5 เรียง 4)
+DEFAULT_K = {3: 3, 4: 4, 5: 4}
+
+@lru_cache(maxsize=None)
+def win_masks(size: int = 3, k: int = 3):
   """
-  รับบอร์ด XO (เช่น 'XOXOX--O-') แล้วคืนผล:
-  - 'X' หรือ 'O' → มีผู้ชนะ
-  - 'draw' → เสมอ
-  - None → ยังไม่จบเกม
+  คืน bitmask ของทุกแนวชนะ (แถว คอลัมน์ ทแยงทั้งสองทาง) ที่ยาว k บนกระดาน size x size
+  บิตที่ i คือช่อง i (นับจากซ้ายบน ไล่ทีละแถว)
   """
+  masks = []
+  for row, col in product(range(size), repeat=2):
+    for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+      end_row, end_col = row + d_row * (k - 1), col + d_col * (k - 1)
+      if not (0 <= end_row < size and 0 <= end_col < size):
+        continue
+      mask = 0
+      for step in range(k):
+        mask |= 1 << ((row + d_row * step) * size + col + d_col * step)
+      masks.append(mask)
+  return tuple(masks)
 
-  win_conditions = [
-      [0, 1, 2], [3, 4, 5], [6, 7, 8],  # แถว
-      [0, 3, 6], [1, 4, 7], [2, 5, 8],  # คอลัมน์
-      [0, 4, 8], [2, 4, 6]              # ทแยง
-  ]
+@lru_cache(maxsize=None)
+def cell_win_masks(size: int = 3, k: int = 3):
+  """
+  แนวชนะที่ผ่านแต่ละช่อง ใช้ตรวจแบบ incremental รอบตาที่เพิ่งเดิน
+  """
+  masks = win_masks(size, k)
+  return tuple(
+    tuple(mask for mask in masks if mask >> cell & 1)
+    for cell in range(size * size)
+  )
 
-  for condition in win_conditions:
-      a, b, c = condition
-      if board[a] != '-' and board[a] == board[b] == board[c]:
-          return board[a]  # 'X' หรือ 'O'
+def _has_line(mask: int, masks) -> bool:
+  for line in masks:
+    if mask & line == line:
+      return True
+  return False
 
-  if '-' not in board:
-      return 'draw'
+# ⚡ 3x3: ตารางสำเร็จรูป
+# _WINS_3X3[mask] → ชุดช่องของฝ่ายหนึ่งมีแนวชนะไหม (512 ค่า)
+# _RESULTS_3X3[board] → ผลของทุกกระดาน 3^9 แบบ ในรูปสตริงเดียวกับ DB
+FULL_3X3 = (1 << 9) - 1
+_WINS_3X3 = bytes(_has_line(mask, win_masks(3, 3)) for mask in range(1 << 9))
 
+def _result_3x3(x: int, o: int):
+  if _WINS_3X3[x]:
+    return 'X'
+  if _WINS_3X3[o]:
+    return 'O'
+  if x | o == FULL_3X3:
+    return 'draw'
   return None
+
+def _build_results_3x3():
+  results = {}
+  for cells in product('-XO', repeat=9):
+    x = o = 0
+    for idx, cell in enumerate(cells):
+      if cell == 'X':
+        x |= 1 << idx
+      elif cell == 'O':
+        o |= 1 << idx
+    results[''.join(cells)] = _result_3x3(x, o)
+  return results
+
+_RESULTS_3X3 = _build_results_3x3()
+
+# ช่องว่าง (bitmask) → tuple ของช่องที่เดินได้
+_LEGAL_MOVES_3X3 = tuple(
+  tuple(idx for idx in range(9) if empty >> idx & 1)
+  for empty in range(1 << 9)
+)
+
+class BitBoard:
+  """
+  กระดาน N×N แบบ bitmask สองตัว (x, o) เรียง k ตัวเพื่อชนะ
+  - 3x3 ใช้ตารางสำเร็จรูป: ตรวจผล/หาช่องว่างเป็น O(1)
+  - ขนาดอื่นตรวจเฉพาะแนวที่ผ่านตาล่าสุดใน play()
+  """
+  __slots__ = ("size", "k", "x", "o", "full", "_cell_masks")
+
+  def __init__(self, size: int = 3, k: int = None, x: int = 0, o: int = 0):
+    self.size = size
+    self.k = k or DEFAULT_K.get(size, size)
+    self.x = x
+    self.o = o
+    self.full = (1 << (size * size)) - 1
+    self._cell_masks = cell_win_masks(size, self.k)
+
+  @classmethod
+  def from_string(cls, board: str, k: int = None):
+    x = o = 0
+    for idx, cell in enumerate(board):
+      if cell == 'X':
+        x |= 1 << idx
+      elif cell == 'O':
+        o |= 1 << idx
+    return cls(isqrt(len(board)), k, x, o)
+
+  def to_string(self) -> str:
+    return ''.join(
+      'X' if self.x >> idx & 1 else 'O' if self.o >> idx & 1 else '-'
+      for idx in range(self.size * self.size)
+    )
+
+  def is_empty(self, index: int) -> bool:
+    return not (self.x | self.o) >> index & 1
+
+  def legal_moves(self):
+    empty = self.full & ~(self.x | self.o)
+    if self.size == 3:
+      return _LEGAL_MOVES_3X3[empty]
+    return tuple(idx for idx in range(self.size * self.size) if empty >> idx & 1)
+
+  def winner(self):
+    """
+    ตรวจทั้งกระดาน คืนค่าแบบเดียวกับ check_winner: 'X' / 'O' / 'draw' / None
+    """
+    if self.size == 3 and self.k == 3:
+      return _result_3x3(self.x, self.o)
+    masks = win_masks(self.size, self.k)
+    if _has_line(self.x, masks):
+      return 'X'
+    if _has_line(self.o, masks):
+      return 'O'
+    if self.x | self.o == self.full:
+      return 'draw'
+    return None
+
+  def play(self, index: int, mark: str):
+    """
+    วาง mark ('X' หรือ 'O') ที่ช่อง index แล้วคืนผลหลังตานี้
+    ตรวจเฉพาะแนวที่ผ่านช่องนี้ (สมมติว่าก่อนหน้านี้ยังไม่มีใครชนะ)
+    """
+    bit = 1 << index
+    if mark == 'X':
+      self.x |= bit
+      mine = self.x
+    else:
+      self.o |= bit
+      mine = self.o
+
+    if self.size == 3 and self.k == 3:
+      if _WINS_3X3[mine]:
+        return mark
+    elif _has_line(mine, self._cell_masks[index]):
+      return mark
+
+    if self.x | self.o == self.full:
+      return 'draw'
+    return None
+
+# 🎞️ บันทึกตาแบบหนึ่งไบต์: 5 บิตล่างคือช่อง (0-24) บิตบนสุดคือ O
+MOVE_O_FLAG = 0x80
+
+def encode_move(index: int, mark: str) -> int:
+  return index | MOVE_O_FLAG if mark == 'O' else index
+
+def decode_move(move: int):
+  return move & 0x1F, 'O' if move & MOVE_O_FLAG else 'X'
+
+def replay_moves(moves: bytes, size: int = 3):
+  """
+  เล่นลำดับตาซ้ำจากต้น คืนสตริงกระดานของแต่ละตา (ไม่รวมกระดานว่าง)
+  """
+  board = ['-'] * (size * size)
+  boards = []
+  for move in moves:
+    index, mark = decode_move(move)
+    board[index] = mark
+    boards.append(''.join(board))
+  return boards
+
+def check_winner(board: str):
+  """
+  รับบอร์ด XO (เช่น 'XOXOX--O-') แล้วคืนผล:
+  - 'X' หรือ 'O' → มีผู้ชนะ
+  - 'draw' → เสมอ
+  - None → ยังไม่จบเกม
+  """
+  if len(board) == 9:
+    return _RESULTS_3X3[board]
+  return BitBoard.from_string(board).winner()
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from db.database import add_to_queue, remove_from_queue, get_queue, get_ratings
+from metrics import QUEUE_WAIT
+
+log = logging.getLogger(__name__)
+
+DEFAULT_RATING = 1000
+
+class Ticket:
+    __slots__ = ("user_id", "username", "guild_id", "channel_id", "rating", "joined_at")
+
+    def __init__(self, user_id: int, username: str, guild_id: int, channel_id: int,
+                 rating: int = DEFAULT_RATING, joined_at: datetime = None):
+        self.user_id = user_id
+        self.username = username
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.rating = rating
+        self.joined_at = joined_at or datetime.utcnow()
+
+class Matchmaker:
+    """
+    คิวจับคู่ในหน่วยความจำ (ตาราง matchmaking_queue เป็นแค่สำเนาไว้กู้คืนตอนรีสตาร์ท)
+    - ผู้เล่นถูกแบ่งเป็นถัง (guild, ช่วง rating) เรียงตามเวลาเข้า
+    - join() ตัดสินใจจับคู่แบบ synchronous ทั้งหมด ไม่มี await คั่น จึงไม่มีทางจับคู่ซ้ำ
+    - ยิ่งรอนาน ช่วง rating ที่ยอมรับได้ยิ่งกว้าง และหลัง `cross_guild_after` จะจับคู่ข้าม guild ได้
+    จำนวนถังที่ต้องดูต่อหนึ่ง join มีไม่เกิน 2 * (max_span + 1) ถัง → O(1)
+    """
+
+    def __init__(self, band_size: int = 100, widen_every: timedelta = timedelta(seconds=15),
+                 max_span: int = 5, cross_guild_after: timedelta = timedelta(seconds=30),
+                 max_wait: timedelta = timedelta(minutes=10)):
+        self.band_size = band_size
+        self.widen_every = widen_every
+        self.max_span = max_span
+        self.cross_guild_after = cross_guild_after
+        self.max_wait = max_wait
+        self._tickets = {}
+        self._guild_bands = {}
+        self._bands = {}
+        self._pairing = set()
+        self._task = None
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def band(self, rating: int):
+        return rating // self.band_size
+
+    def is_queued(self, user_id: int):
+        return user_id in self._tickets
+
+    # อยู่ในคิว หรือถูกจับคู่แล้วแต่เกมยังสร้างไม่เสร็จ
+    def is_busy(self, user_id: int):
+        return user_id in self._tickets or user_id in self._pairing
+
+    # แบบ async เพื่อให้ใช้แทนกันได้กับคิวกลางของ cluster (game.cluster.RemoteMatchmaker)
+    async def check_busy(self, user_id: int):
+        return self.is_busy(user_id)
+
+    def _span(self, ticket: Ticket, now: datetime):
+        return min(self.max_span, int((now - ticket.joined_at) / self.widen_every))
+
+    def _acceptable(self, waiting: Ticket, joiner: Ticket, now: datetime):
+        if abs(self.band(waiting.rating) - self.band(joiner.rating)) > self._span(waiting, now):
+            return False
+        return waiting.guild_id == joiner.guild_id or now - waiting.joined_at >= self.cross_guild_after
+
+    def _candidate_bands(self, band: int):
+        yield band
+        for distance in range(1, self.max_span + 1):
+            yield band - distance
+            yield band + distance
+
+    def _find(self, joiner: Ticket, now: datetime):
+        band = self.band(joiner.rating)
+        # guild เดียวกันก่อน แล้วค่อยดูทุก guild; ดูแค่คนที่รอนานสุดของแต่ละถัง (ช่วงกว้างสุด)
+        for buckets, key in (
+            (self._guild_bands, lambda b: (joiner.guild_id, b)),
+            (self._bands, lambda b: b),
+        ):
+            for candidate_band in self._candidate_bands(band):
+                bucket = buckets.get(key(candidate_band))
+                if not bucket:
+                    continue
+                waiting = next(iter(bucket.values()))
+                if self._acceptable(waiting, joiner, now):
+                    return waiting
+        return None
+
+    def _enqueue(self, ticket: Ticket):
+        band = self.band(ticket.rating)
+        self._tickets[ticket.user_id] = ticket
+        self._guild_bands.setdefault((ticket.guild_id, band), OrderedDict())[ticket.user_id] = ticket
+        self._bands.setdefault(band, OrderedDict())[ticket.user_id] = ticket
+
+    def _dequeue(self, user_id: int):
+        ticket = self._tickets.pop(user_id, None)
+        if ticket is None:
+            return None
+        band = self.band(ticket.rating)
+        for buckets, key in ((self._guild_bands, (ticket.guild_id, band)), (self._bands, band)):
+            bucket = buckets[key]
+            del bucket[user_id]
+            if not bucket:
+                del buckets[key]
+        return ticket
+
+    def try_match(self, joiner: Ticket):
+        """
+        ส่วน atomic ของการเข้าคิว: คืน Ticket ของคู่ที่จับได้ หรือ None (ถูกใส่คิวแทน)
+        ผู้เล่นที่ยุ่งอยู่แล้วจะไม่ถูกใส่คิวซ้ำ
+        """
+        if self.is_busy(joiner.user_id):
+            return None
+        now = datetime.utcnow()
+        opponent = self._find(joiner, now)
+        if opponent is None:
+            self._enqueue(joiner)
+            return None
+        self._dequeue(opponent.user_id)
+        QUEUE_WAIT.observe((now - opponent.joined_at).total_seconds())
+        self._pairing.update((joiner.user_id, opponent.user_id))
+        return opponent
+
+    async def join(self, joiner: Ticket):
+        opponent = self.try_match(joiner)
+        if opponent is not None:
+            await remove_from_queue([opponent.user_id])
+        elif self.is_queued(joiner.user_id):
+            await add_to_queue(joiner.user_id, joiner.username, joiner.guild_id, joiner.channel_id,
+                               joiner.joined_at.isoformat())
+        return opponent
+
+    async def leave(self, user_id: int):
+        if self._dequeue(user_id) is not None:
+            await remove_from_queue([user_id])
+            return True
+        return False
+
+    # ✅ เรียกหลังสร้างเกมของคู่ที่จับได้เสร็จ (หรือสร้างไม่สำเร็จ)
+    def release(self, *user_ids):
+        self._pairing.difference_update(user_ids)
+
+    async def restore(self):
+        queue = await get_queue()
+        ratings = await get_ratings([row[0] for row in queue])
+        for user_id, username, guild_id, channel_id, timestamp in queue:
+            if user_id not in self._tickets:
+                rating = ratings[user_id][0] if user_id in ratings else DEFAULT_RATING
+                self._enqueue(Ticket(user_id, username, guild_id, channel_id, rating,
+                                     joined_at=datetime.fromisoformat(timestamp)))
+
+    # 🧹 เอาคนที่รอเกิน max_wait ออกจากคิว คืนรายการ Ticket ที่หมดอายุ
+    async def expire_stale(self):
+        cutoff = datetime.utcnow() - self.max_wait
+        # _tickets เรียงตามลำดับเข้าคิวอยู่แล้ว หยุดที่คนแรกที่ยังไม่หมดอายุ
+        stale = []
+        for ticket in self._tickets.values():
+            if ticket.joined_at >= cutoff:
+                break
+            stale.append(ticket.user_id)
+        expired = [self._dequeue(user_id) for user_id in stale]
+        await remove_from_queue(stale)
+        return expired
+
+    def start(self, sweep_every: float = 30.0):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(sweep_every))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, sweep_every: float):
+        await self.restore()
+        while True:
+            await asyncio.sleep(sweep_every)
+            try:
+                expired = await self.expire_stale()
+                if expired:
+                    log.info("⌛ เอาผู้เล่น %s คนที่รอนานเกินไปออกจากคิว", len(expired), extra={"count": len(expired)})
+            except Exception:
+                log.exception("⚠️ ข้อผิดพลาดในการล้างคิว")
+
+# 🤝 คิวเดียวของทั้ง process
+matchmaker = Matchmaker()
@@ -0,0 +1,204 @@
+import asyncio
+from collections import OrderedDict
+from db.database import get_ratings, save_ratings, get_rating_histogram, get_leaderboard_page
+from game.matchmaking import DEFAULT_RATING
+
+ELO_K = 32
+# ช่วงคะแนนที่ตารางอันดับรองรับ (คะแนนนอกช่วงถูกนับรวมไว้ที่ขอบ)
+MAX_RATING = 4000
+
+def expected_score(rating: int, opponent: int):
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+def elo_update(rating_x: int, rating_o: int, winner: str, k: int = ELO_K):
+    """
+    คืนคะแนนใหม่ (x, o) หลังจบเกม winner: 'X' / 'O' / 'draw'
+    """
+    score_x = 1.0 if winner == 'X' else 0.0 if winner == 'O' else 0.5
+    delta = round(k * (score_x - expected_score(rating_x, rating_o)))
+    return rating_x + delta, rating_o - delta
+
+class RankTree:
+    """
+    Fenwick tree นับจำนวนผู้เล่นต่อคะแนน 0..MAX_RATING
+    - add / count_above / kth_highest เป็น O(log MAX_RATING) ไม่ขึ้นกับจำนวนผู้เล่น
+    """
+
+    def __init__(self, max_rating: int = MAX_RATING):
+        self.max_rating = max_rating
+        self.total = 0
+        self._tree = [0] * (max_rating + 2)
+
+    def _slot(self, rating: int):
+        return min(max(rating, 0), self.max_rating) + 1
+
+    def add(self, rating: int, count: int = 1):
+        self.total += count
+        slot = self._slot(rating)
+        while slot < len(self._tree):
+            self._tree[slot] += count
+            slot += slot & -slot
+
+    def count_at_most(self, rating: int):
+        slot = self._slot(rating)
+        count = 0
+        while slot > 0:
+            count += self._tree[slot]
+            slot -= slot & -slot
+        return count
+
+    def count_above(self, rating: int):
+        return self.total - self.count_at_most(rating)
+
+    def kth_highest(self, k: int):
+        """
+        คะแนนของผู้เล่นอันดับที่ k (เริ่มที่ 1) เมื่อเรียงจากมากไปน้อย
+        """
+        # หา slot แรกที่ผลรวมสะสม (จากคะแนนต่ำ) >= total - k + 1
+        target = self.total - k + 1
+        slot = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = slot + step
+            if nxt < len(self._tree) and self._tree[nxt] < target:
+                slot = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return slot
+
+class Leaderboard:
+    """
+    คะแนน ELO ของผู้เล่น: ตาราง player_ratings เป็นข้อมูลจริง ส่วนอันดับคิดจาก RankTree ในหน่วยความจำ
+    - อันดับ = 1 + จำนวนคนที่คะแนนสูงกว่า (คะแนนเท่ากันได้อันดับเดียวกัน)
+    - หน้าลีดเดอร์บอร์ดหาคะแนนเริ่มต้นจาก RankTree แล้วเดิน index idx_player_ratings_rank
+    - หน้าที่ถูกเปิดบ่อยเก็บไว้ใน LRU และถูกล้างเฉพาะหน้าที่ช่วงอันดับถูกกระทบเมื่อคะแนนเปลี่ยน
+    """
+
+    def __init__(self, page_size: int = 10, cached_pages: int = 32):
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self._ranks = RankTree()
+        self._pages = OrderedDict()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._update_lock = asyncio.Lock()
+        # เรียกพร้อม [(คะแนนเดิม, คะแนนใหม่), ...] หลังคะแนนเปลี่ยน (ใช้แจ้ง process อื่นในโหมด cluster)
+        self.listeners = []
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            for rating, count in await get_rating_histogram():
+                self._ranks.add(rating, count)
+            self._loaded = True
+
+    @property
+    def players(self):
+        return self._ranks.total
+
+    def rank_of(self, rating: int):
+        return self._ranks.count_above(rating) + 1
+
+    async def rating(self, user_id: int):
+        row = (await get_ratings([user_id])).get(user_id)
+        return row[0] if row else DEFAULT_RATING
+
+    async def profile(self, user_id: int):
+        """
+        คืน dict ของคะแนนและสถิติ (rank เป็น None ถ้ายังไม่เคยจบเกมจัดอันดับ)
+        """
+        await self._ensure_loaded()
+        row = (await get_ratings([user_id])).get(user_id)
+        if row is None:
+            return {"rating": DEFAULT_RATING, "wins": 0, "losses": 0, "draws": 0, "rank": None}
+        rating, wins, losses, draws = row
+        return {"rating": rating, "wins": wins, "losses": losses, "draws": draws, "rank": self.rank_of(rating)}
+
+    async def page(self, number: int):
+        """
+        หน้าที่ number (เริ่มที่ 1) → [(rank, user_id, rating, wins, losses, draws), ...]
+        """
+        await self._ensure_loaded()
+        cached = self._pages.get(number)
+        if cached is not None:
+            self._pages.move_to_end(number)
+            return cached
+
+        start = (number - 1) * self.page_size + 1
+        if number < 1 or start > self._ranks.total:
+            return []
+        first_rating = self._ranks.kth_highest(start)
+        skip = start - 1 - self._ranks.count_above(first_rating)
+        rows = await get_leaderboard_page(first_rating, self.page_size, skip)
+        entries = [(self.rank_of(row[1]), *row) for row in rows]
+
+        self._pages[number] = entries
+        if len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+        return entries
+
+    def _invalidate(self, low_rank: int, high_rank: int):
+        # ล้างเฉพาะหน้าที่ช่วงอันดับ [low_rank, high_rank] คาบเกี่ยว
+        first_page = (low_rank - 1) // self.page_size + 1
+        last_page = (high_rank - 1) // self.page_size + 1
+        for number in [n for n in self._pages if first_page <= n <= last_page]:
+            del self._pages[number]
+
+    def _move(self, old, new: int):
+        # ตำแหน่งที่เปลี่ยนคือผู้เล่นที่คะแนนอยู่ระหว่างคะแนนเดิมกับคะแนนใหม่
+        # คนใหม่ทำให้ทุกคนที่อยู่ต่ำกว่าเลื่อนลงหนึ่งตำแหน่ง
+        if old is not None:
+            self._ranks.add(old, -1)
+        self._ranks.add(new)
+        if old is None:
+            self._invalidate(self.rank_of(new), self._ranks.total)
+        else:
+            self._invalidate(self.rank_of(max(old, new)), self._ranks.count_above(min(old, new) - 1))
+
+    def apply_changes(self, changes):
+        # ยังไม่โหลดตารางอันดับ → ตอนโหลดจะอ่านคะแนนล่าสุดจาก DB อยู่แล้ว
+        if not self._loaded:
+            return
+        for old, new in changes:
+            self._move(old, new)
+
+    async def record_result(self, player_x: int, player_o: int, winner: str):
+        """
+        อัปเดต ELO ของสองผู้เล่นหลังจบเกม winner: 'X' / 'O' / 'draw'
+        """
+        await self._ensure_loaded()
+        # ผู้เล่นคนเดียวกันอาจจบหลายเกมพร้อมกัน ต้องอ่าน-คำนวณ-เขียนทีละเกม
+        async with self._update_lock:
+            current = await get_ratings([player_x, player_o])
+            old_x = current.get(player_x)
+            old_o = current.get(player_o)
+            wins_x, losses_x, draws_x = old_x[1:] if old_x else (0, 0, 0)
+            wins_o, losses_o, draws_o = old_o[1:] if old_o else (0, 0, 0)
+            rating_x, rating_o = elo_update(
+                old_x[0] if old_x else DEFAULT_RATING,
+                old_o[0] if old_o else DEFAULT_RATING,
+                winner
+            )
+
+            if winner == 'X':
+                wins_x, losses_o = wins_x + 1, losses_o + 1
+            elif winner == 'O':
+                wins_o, losses_x = wins_o + 1, losses_x + 1
+            else:
+                draws_x, draws_o = draws_x + 1, draws_o + 1
+
+            await save_ratings([
+                (player_x, rating_x, wins_x, losses_x, draws_x),
+                (player_o, rating_o, wins_o, losses_o, draws_o),
+            ])
+            changes = [(old_x[0] if old_x else None, rating_x), (old_o[0] if old_o else None, rating_o)]
+            self.apply_changes(changes)
+            for listener in self.listeners:
+                listener(changes)
+            return rating_x, rating_o
+
+# 🏆 ลีดเดอร์บอร์ดเดียวของทั้ง process
+leaderboard = Leaderboard()
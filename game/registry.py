@@ -0,0 +1,65 @@
+from collections import OrderedDict
+
+class GameRegistry:
+    """
+    cache ของเกมที่กำลังเล่นอยู่ใน process นี้ (game_id → XOGameView) แบบ LRU มีขนาดจำกัด
+    view เป็นเจ้าของกระดาน ตา และข้อความ DM ของเกมนั้นๆ
+    เกมที่ถูกไล่ออกจาก cache จะถูกโหลดกลับจาก DB เมื่อมีคนกดปุ่ม (ดู game.views.load_game)
+    """
+
+    def __init__(self, max_games: int = 10_000):
+        self.max_games = max_games
+        self._games = OrderedDict()
+        self._players = {}
+
+    def __len__(self):
+        return len(self._games)
+
+    def __contains__(self, game_id):
+        return game_id in self._games
+
+    def __iter__(self):
+        return iter(list(self._games.values()))
+
+    # คืน view ที่อยู่ใน registry จริง (ถ้ามีเกมนี้อยู่แล้วจะคืนตัวเดิม)
+    def add(self, view):
+        existing = self._games.get(view.game_id)
+        if existing is not None:
+            return existing
+        self._games[view.game_id] = view
+        self._players[view.player_x] = view.game_id
+        self._players[view.player_o] = view.game_id
+        self._evict()
+        return view
+
+    def get(self, game_id):
+        view = self._games.get(game_id)
+        if view is not None:
+            self._games.move_to_end(game_id)
+        return view
+
+    def remove(self, game_id):
+        view = self._games.pop(game_id, None)
+        if view is None:
+            return None
+        for player_id in (view.player_x, view.player_o):
+            if self._players.get(player_id) == game_id:
+                del self._players[player_id]
+        return view
+
+    def game_for_player(self, user_id):
+        game_id = self._players.get(user_id)
+        return self._games.get(game_id) if game_id is not None else None
+
+    # ไล่เกมที่ไม่ได้ใช้นานที่สุดออก ข้ามเกมที่กำลังประมวลผลตาอยู่ (ถือ lock)
+    def _evict(self):
+        if len(self._games) <= self.max_games:
+            return
+        for game_id, view in list(self._games.items()):
+            if len(self._games) <= self.max_games:
+                break
+            if not view.lock.locked():
+                self.remove(game_id)
+
+# 🗂️ registry เดียวของทั้ง process
+live_games = GameRegistry()
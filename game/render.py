@@ -0,0 +1,40 @@
+from functools import lru_cache
+from math import isqrt
+from nextcord import ButtonStyle
+
+# หน้าตาปุ่มของแต่ละสถานะช่อง: (label, style)
+CELL_RENDER = {
+    'X': ('X', ButtonStyle.green),
+    'O': ('O', ButtonStyle.red),
+    '-': ('⬜', ButtonStyle.grey),
+}
+
+def apply_cell(button, mark: str):
+    button.label, button.style = CELL_RENDER[mark]
+
+# ข้อความส่วนที่ไม่เปลี่ยนของแต่ละตา คำนวณครั้งเดียวต่อคู่ผู้เล่น
+def turn_prefixes(player_x: int, player_o: int):
+    return {
+        'X': f"🎯 ตาของ <@{player_x}>\n⏳ เวลาที่เหลือ: ",
+        'O': f"🎯 ตาของ <@{player_o}>\n⏳ เวลาที่เหลือ: ",
+    }
+
+# เวลาที่เหลือมีได้ไม่กี่ร้อยค่า (ทุกวินาทีของเกม) จึง cache ได้ทั้งหมด
+@lru_cache(maxsize=1024)
+def time_left_text(seconds: int):
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes} นาที {seconds} วินาที"
+
+# 👀 กระดานของผู้ชมเป็นข้อความล้วน (ไม่มีปุ่ม จึงกดไม่ได้และ payload เล็ก)
+CELL_EMOJI = {'X': '❌', 'O': '⭕', '-': '⬜'}
+
+def board_text(board):
+    size = isqrt(len(board))
+    cells = [CELL_EMOJI[mark] for mark in board]
+    return "\n".join("".join(cells[row:row + size]) for row in range(0, len(cells), size))
+
+# status: บรรทัดล่าง (ไม่ใส่ = ตาของใคร) เช่นผลเกมตอนจบ
+def spectator_text(game_id: int, player_x: int, player_o: int, board, turn: str, status: str = None):
+    if status is None:
+        status = f"🎯 ตาของ <@{player_x if turn == 'X' else player_o}>"
+    return f"👀 เกม #{game_id}: ❌ <@{player_x}> vs ⭕ <@{player_o}>\n{board_text(board)}\n{status}"
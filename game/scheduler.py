@@ -0,0 +1,100 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta
+from db.database import get_all_active_games
+from metrics import TIMEOUT_SWEEP
+
+log = logging.getLogger(__name__)
+
+GAME_TIMEOUT = timedelta(minutes=5)
+
+class DeadlineScheduler:
+    """
+    ตัวจับเวลาหมดอายุของเกมแบบ min-heap:
+    - schedule / cancel เป็น O(log n) / O(1) (ลบแบบ lazy ตอน pop)
+    - ตื่นตรงเวลาหมดอายุถัดไปพอดี แล้วส่งเกมที่หมดเวลาให้ callback ทีละชุด
+    """
+
+    def __init__(self, timeout: timedelta = GAME_TIMEOUT, batch_size: int = 50):
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._heap = []
+        self._deadlines = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def deadline_for(self, start_time: datetime):
+        return start_time + self.timeout
+
+    def schedule(self, game_id: int, start_time: datetime):
+        deadline = self.deadline_for(start_time)
+        self._deadlines[game_id] = deadline
+        heapq.heappush(self._heap, (deadline, game_id))
+        if self._heap[0][1] == game_id:
+            self._wakeup.set()
+
+    def cancel(self, game_id: int):
+        self._deadlines.pop(game_id, None)
+
+    def _next_deadline(self):
+        # ทิ้งรายการที่ถูก cancel หรือถูก schedule ใหม่แล้ว
+        while self._heap:
+            deadline, game_id = self._heap[0]
+            if self._deadlines.get(game_id) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: datetime):
+        batch = []
+        while len(batch) < self.batch_size:
+            deadline = self._next_deadline()
+            if deadline is None or deadline > now:
+                break
+            _, game_id = heapq.heappop(self._heap)
+            del self._deadlines[game_id]
+            batch.append(game_id)
+        return batch
+
+    async def rebuild(self):
+        for game_id, start_time_str in await get_all_active_games():
+            if game_id not in self._deadlines:
+                self.schedule(game_id, datetime.fromisoformat(start_time_str))
+
+    def start(self, on_expire):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(on_expire))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, on_expire):
+        await self.rebuild()
+        while True:
+            self._wakeup.clear()
+            deadline = self._next_deadline()
+            now = datetime.utcnow()
+
+            if deadline is None or deadline > now:
+                delay = None if deadline is None else (deadline - now).total_seconds()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._pop_due(now)
+            try:
+                with TIMEOUT_SWEEP.time():
+                    await on_expire(batch)
+            except Exception:
+                log.exception("⚠️ ข้อผิดพลาดในการหมดเวลาเกม %s", batch, extra={"count": len(batch)})
+
+# ⏰ ตัวจับเวลาเดียวของทั้ง process
+game_timeouts = DeadlineScheduler()
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from collections import OrderedDict
+import nextcord
+
+class UserCache:
+    """
+    cache ของช่อง DM ต่อผู้เล่น (user_id → DMChannel) แบบ LRU มีขนาดจำกัดและหมดอายุตาม `ttl` วินาที
+    - ดู cache ของ gateway ก่อน (bot.get_user → user.dm_channel) ถ้าไม่มีจึงเปิดช่อง DM ผ่าน REST ครั้งเดียว
+      โดยไม่ต้อง fetch_user (create_dm ใช้แค่ id)
+    - single-flight: คำขอพร้อมกันของผู้เล่นคนเดียวกันรอ task เดียวกัน
+    nextcord เองเก็บช่อง DM ไว้แค่ 128 ช่องล่าสุด ไม่พอเมื่อมีเกมพร้อมกันหลายพันเกม
+    """
+
+    def __init__(self, max_entries: int = 20_000, ttl: float = 6 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._pending = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, user_id: int):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        channel, expires = entry
+        if expires <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return channel
+
+    def _store(self, user_id: int, channel):
+        self._entries[user_id] = (channel, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _open(self, bot, user_id: int):
+        user = bot.get_user(user_id)
+        channel = user.dm_channel if user is not None else None
+        if channel is None:
+            channel = await bot.create_dm(user or nextcord.Object(id=user_id))
+        self._store(user_id, channel)
+        return channel
+
+    def _lookup(self, bot, user_id: int):
+        task = self._pending.get(user_id)
+        if task is None:
+            task = self._pending[user_id] = asyncio.create_task(self._open(bot, user_id))
+            task.add_done_callback(lambda done: self._finish(user_id, done))
+        return task
+
+    def _finish(self, user_id: int, task):
+        if self._pending.get(user_id) is task:
+            del self._pending[user_id]
+        # อ่าน exception ทิ้ง (ผู้รอได้รับเองอยู่แล้ว) กัน "Task exception was never retrieved" ของ prefetch
+        if not task.cancelled():
+            task.exception()
+
+    async def dm_channel(self, bot, user_id: int):
+        channel = self._get(user_id)
+        if channel is not None:
+            return channel
+        # shield: ผู้รอคนหนึ่งถูกยกเลิก คนอื่นที่รอ task เดียวกันยังได้ผล
+        return await asyncio.shield(self._lookup(bot, user_id))
+
+    # 📨 เปิดช่อง DM ล่วงหน้าระหว่างผู้เล่นรอคิว ตอนเริ่มเกมจะเหลือแค่ส่งข้อความ
+    def prefetch(self, bot, user_id: int):
+        if self._get(user_id) is None:
+            self._lookup(bot, user_id)
+
+    # 📨 ส่งข้อความทาง DM: ถ้าช่องถูกลบหรือผู้เล่นปิด DM ก็ทิ้งช่องจาก cache ครั้งหน้าจะเปิดใหม่
+    async def send(self, bot, user_id: int, **fields):
+        channel = await self.dm_channel(bot, user_id)
+        try:
+            return await channel.send(**fields)
+        except (nextcord.Forbidden, nextcord.NotFound):
+            self.forget(user_id)
+            raise
+
+    def forget(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+# 👤 cache เดียวของทั้ง process
+user_cache = UserCache()
@@ -1,48 +1,119 @@
 import nextcord
 from nextcord.ui import View, Button
-from nextcord import ButtonStyle, Interaction
-from db.database import update_board, get_game_state, end_game
-from game.game_state import check_winner
+from nextcord import Interaction
+from db.database import end_game, get_game_states, get_game_messages
+from db.journal import move_journal
+from game.game_state import BitBoard, encode_move
+from game.scheduler import game_timeouts, GAME_TIMEOUT
+from game.registry import live_games
+from game.fanout import message_fanout, spectator_fanout
+from game.render import apply_cell, turn_prefixes, time_left_text, spectator_text
+from game.bot_ai import BotOpponent
+from game.counters import live_counters
+from game.ratings import leaderboard
 import asyncio
-from datetime import datetime, timedelta
+import logging
+import time
+from datetime import datetime
+from metrics import MOVE_LATENCY, LOCK_WAIT, REST_EDIT
+
+log = logging.getLogger(__name__)
+
+# เกมที่กำลังปิด (finish แล้วแต่ end_game ยังไม่ commit) ห้ามโหลดกลับจาก DB
+_finishing = set()
+
+# custom_id ของปุ่ม: "xo:<game_id>:<ช่อง>" ให้ dispatcher กลางรู้ว่าเป็นปุ่มของเกมไหน
+CUSTOM_ID_PREFIX = "xo"
+
+def button_custom_id(game_id: int, index: int):
+    return f"{CUSTOM_ID_PREFIX}:{game_id}:{index}"
+
+# คืน (game_id, index) หรือ None ถ้าไม่ใช่ปุ่ม XO
+def parse_custom_id(custom_id: str):
+    prefix, _, rest = custom_id.partition(":")
+    if prefix != CUSTOM_ID_PREFIX:
+        return None
+    game_id, _, index = rest.partition(":")
+    if not (game_id.isdigit() and index.isdigit()):
+        return None
+    return int(game_id), int(index)
 
 class XOGameView(View):
-    def __init__(self, game_id: int, player_x: int, player_o: int, board: str, turn: str, start_time: str):
-        super().__init__(timeout=None)
+    def __init__(self, game_id: int, player_x: int, player_o: int, board: str, turn: str, start_time: str, opponent=None, moves: bytes = b""):
+        # prevent_update=False: nextcord ไม่ต้องเก็บ view ไว้ใน ViewStore
+        # ปุ่มทั้งหมดถูกส่งต่อมาที่ dispatcher ตาม custom_id แทน
+        super().__init__(timeout=None, prevent_update=False)
         self.game_id = game_id
         self.player_x = player_x
         self.player_o = player_o
         self.board = list(board)
+        self.engine = BitBoard.from_string(board)
+        self.moves = bytearray(moves)
         self.turn = turn
         self.start_time = datetime.fromisoformat(start_time)
         self.lock = asyncio.Lock()
         self.messages = []
+        # ข้อความกระดานของผู้ชม (/xowatch) ในห้องของ guild อัปเดตผ่าน spectator_fanout
+        self.spectators = []
+        # ผลสุดท้าย (ตั้งตอนเกมจบ) ให้กระดานผู้ชมที่ส่งมาระหว่างเกมกำลังจบ
+        self.final_status = None
+        # BotOpponent เมื่อเล่นกับบอท (None = ผู้เล่นสองคน)
+        self.opponent = opponent
+        self.deadline = self.start_time + GAME_TIMEOUT
+        self.turn_prefixes = turn_prefixes(player_x, player_o)
         self.build_buttons()
 
+    # สร้างปุ่มครั้งเดียว หลังจากนั้นแก้เฉพาะช่องที่เปลี่ยนผ่าน refresh_cell
     def build_buttons(self):
         self.clear_items()
-        for idx in range(9):
-            label = self.board[idx] if self.board[idx] != '-' else '⬜'
-            style = ButtonStyle.green if self.board[idx] == 'X' else (
-                    ButtonStyle.red if self.board[idx] == 'O' else ButtonStyle.grey)
-            self.add_item(XOButton(idx, label, style))
+        self.buttons = []
+        for idx in range(len(self.board)):
+            button = XOButton(self.game_id, idx, row=idx // self.engine.size)
+            apply_cell(button, self.board[idx])
+            self.buttons.append(button)
+            self.add_item(button)
+
+    def refresh_cell(self, index: int):
+        apply_cell(self.buttons[index], self.board[index])
 
     def get_time_left(self):
-        elapsed = datetime.utcnow() - self.start_time
-        remaining = max(timedelta(minutes=5) - elapsed, timedelta(seconds=0))
-        minutes, seconds = divmod(int(remaining.total_seconds()), 60)
-        return f"{minutes} นาที {seconds} วินาที"
+        remaining = max((self.deadline - datetime.utcnow()).total_seconds(), 0)
+        return time_left_text(int(remaining))
 
     def current_turn_display(self):
-        turn_user = f"<@{self.player_x}>" if self.turn == 'X' else f"<@{self.player_o}>"
-        return f"""🎯 ตาของ {turn_user}
-⏳ เวลาที่เหลือ: {self.get_time_left()}"""
+        return self.turn_prefixes[self.turn] + self.get_time_left()
+
+    def spectator_display(self, status: str = None):
+        return spectator_text(self.game_id, self.player_x, self.player_o, self.board, self.turn, status)
+
+    def final_display(self):
+        return self.spectator_display(self.final_status)
+
+    # 👀 ส่งสถานะล่าสุดให้ผู้ชมโดยไม่รอ: ห้องละ bucket และคิวแยกจากข้อความของผู้เล่น
+    # ตาที่เดินถี่กว่า rate ของห้องจะถูกรวบเหลือสถานะล่าสุดสถานะเดียว
+    def broadcast_spectators(self, status: str = None):
+        if not self.spectators:
+            return
+        content = self.spectator_display(status)
+        for message in self.spectators:
+            spectator_fanout.submit(message, content=content)
 
-    async def update_all_messages(self):
-        for msg in self.messages:
-            await msg.edit(content=self.current_turn_display(), view=self)
+    # หนึ่งข้อความต่อห้อง: ห้องที่ดูอยู่แล้วจะใช้ข้อความใหม่แทน
+    # refresh=True เมื่อข้อความอาจช้ากว่าสถานะปัจจุบัน (สร้างจาก DB บน worker อื่น หรือมีตาเดินระหว่างส่ง)
+    def add_spectator(self, message, refresh: bool = False):
+        if self.is_finished():
+            return
+        self.spectators = [m for m in self.spectators if m.channel.id != message.channel.id]
+        self.spectators.append(message)
+        if refresh:
+            spectator_fanout.submit(message, content=self.spectator_display())
 
-    async def end_game_display(self, winner):
+    async def update_all_messages(self, skip=None):
+        self.broadcast_spectators()
+        await message_fanout.edit_all(self.messages, skip=skip, content=self.current_turn_display(), view=self)
+
+    # interaction: ถ้ามี จะแก้ข้อความของคนที่กดผ่าน response แล้วข้ามข้อความนั้นตอนกระจาย
+    async def end_game_display(self, winner, interaction: Interaction = None):
         if winner == 'X':
             result_msg = f"""🎉 <@{self.player_x}> ชนะ!
 😢 <@{self.player_o}> แพ้"""
@@ -55,51 +126,197 @@ class XOGameView(View):
         for item in self.children:
             item.disabled = True
 
-        await end_game(self.game_id)
+        self.final_status = result_msg
+        self.finish()
+        try:
+            # เขียนกระดานสุดท้ายทันทีก่อนปิดเกม
+            self.record_state()
+            await move_journal.flush()
+            await end_game(self.game_id, winner)
+        finally:
+            self.release()
 
-        for msg in self.messages:
-            await msg.edit(content=result_msg, view=self)
+        skip = None
+        if interaction is not None:
+            with REST_EDIT.time(kind="interaction"):
+                await interaction.response.edit_message(content=result_msg, view=self)
+            skip = interaction.message
+        self.broadcast_spectators(result_msg)
+        await message_fanout.edit_all(self.messages, skip=skip, content=result_msg, view=self)
 
-        self.stop()
+        # 🏆 เกมกับบอทไม่นับคะแนน
+        if self.opponent is None:
+            try:
+                await leaderboard.record_result(self.player_x, self.player_o, winner)
+            except Exception:
+                log.exception("⚠️ อัปเดตคะแนนเกม %s ไม่สำเร็จ", self.game_id, extra={"game_id": self.game_id})
 
     async def expire_due_to_timeout(self):
-        for item in self.children:
-            item.disabled = True
-        await end_game(self.game_id)
-        for msg in self.messages:
-            await msg.edit(content="⏰ หมดเวลาแล้ว! เกมนี้ถือว่าเสมอ", view=self)
+        async with self.lock:
+            if self.is_finished():
+                return
+            for item in self.children:
+                item.disabled = True
+            self.final_status = "⏰ หมดเวลาแล้ว! เกมนี้ถือว่าเสมอ"
+            self.finish()
+            try:
+                await move_journal.flush()
+                await end_game(self.game_id, 'timeout')
+            finally:
+                self.release()
+            self.broadcast_spectators(self.final_status)
+            await message_fanout.edit_all(self.messages, content="⏰ หมดเวลาแล้ว! เกมนี้ถือว่าเสมอ", view=self)
+
+    # 🧹 หยุดเกมและตัวจับเวลา แต่ยังค้าง view ที่จบแล้วไว้ใน registry จนกว่า end_game จะ commit
+    # (ถ้าเอาออกก่อน คลิกที่เข้ามาระหว่างนั้นจะโหลดแถวที่ยัง active จาก DB กลับมาเป็นเกมที่เล่นต่อได้)
+    def finish(self):
+        game_timeouts.cancel(self.game_id)
+        _finishing.add(self.game_id)
         self.stop()
 
+    # เรียกหลัง end_game: เอาออกจาก registry และตัวนับ /status
+    def release(self):
+        live_games.remove(self.game_id)
+        live_counters.game_finished(self.game_id)
+        _finishing.discard(self.game_id)
+
+    def place(self, index: int):
+        self.board[index] = self.turn
+        self.moves.append(encode_move(index, self.turn))
+        self.refresh_cell(index)
+        return self.engine.play(index, self.turn)
+
+    def record_state(self):
+        move_journal.record(self.game_id, ''.join(self.board), self.turn, bytes(self.moves))
+
+    # ผู้เล่นที่เป็นคน (เกมกับบอทตัดบัญชีบอทออก)
+    def human_players(self):
+        if self.opponent is None:
+            return [self.player_x, self.player_o]
+        return [self.player_o if self.opponent.mark == 'X' else self.player_x]
+
+    def next_turn(self):
+        self.turn = 'O' if self.turn == 'X' else 'X'
+
+    # 🤖 ถ้าบอทได้ X ให้บอทเดินตาแรกก่อนส่งกระดาน
+    def play_opening(self):
+        if self.opponent and self.turn == self.opponent.mark:
+            self.place(self.opponent.choose(self.engine))
+            self.next_turn()
+            self.record_state()
+
     async def handle_move(self, interaction: Interaction, index: int):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            outcome = await self._handle_move(interaction, index)
+        finally:
+            seconds = time.perf_counter() - started
+            MOVE_LATENCY.observe(seconds, outcome=outcome)
+            log.info("🎯 %s in game %s", outcome, self.game_id, extra={
+                "event": "move", "game_id": self.game_id, "user_id": interaction.user.id, "seconds": seconds
+            })
+
+    # คืนผลของการกดสำหรับ metrics: 'rejected' / 'end' / 'move'
+    async def _handle_move(self, interaction: Interaction, index: int):
+        waited = time.perf_counter()
         async with self.lock:
+            LOCK_WAIT.observe(time.perf_counter() - waited)
+            if self.is_finished():
+                await interaction.response.send_message("⏰ เกมนี้จบไปแล้ว!", ephemeral=True)
+                return "rejected"
+
             current_player = interaction.user.id
             if (self.turn == 'X' and current_player != self.player_x) or                (self.turn == 'O' and current_player != self.player_o):
                 await interaction.response.send_message("⛔ ไม่ใช่ตาของคุณ!", ephemeral=True)
-                return
+                return "rejected"
 
-            if self.board[index] != '-':
+            if not self.engine.is_empty(index):
                 await interaction.response.send_message("❗ ช่องนี้ถูกเลือกไปแล้ว!", ephemeral=True)
-                return
+                return "rejected"
 
-            self.board[index] = self.turn
-            winner = check_winner(''.join(self.board))
+            winner = self.place(index)
+
+            # บอทตอบทันที แล้วแสดงผลทั้งสองตาในการแก้ข้อความครั้งเดียว
+            if not winner and self.opponent:
+                self.next_turn()
+                winner = self.place(self.opponent.choose(self.engine))
 
             if winner:
-                await interaction.response.defer()
-                await self.end_game_display(winner)
-                return
+                await self.end_game_display(winner, interaction)
+                return "end"
 
-            self.turn = 'O' if self.turn == 'X' else 'X'
-            await update_board(self.game_id, ''.join(self.board), self.turn)
-            self.build_buttons()
-            await interaction.response.edit_message(view=self)
-            await self.update_all_messages()
+            self.next_turn()
+            self.record_state()
+            with REST_EDIT.time(kind="interaction"):
+                await interaction.response.edit_message(content=self.current_turn_display(), view=self)
+
+        # กระจายไปข้อความอื่นนอก lock ตาถัดไปจึงไม่ต้องรอ REST ของตานี้
+        await self.update_all_messages(skip=interaction.message)
+        return "move"
 
 class XOButton(Button):
-    def __init__(self, index: int, label: str, style: ButtonStyle):
-        super().__init__(label=label, style=style, row=index // 3)
+    def __init__(self, game_id: int, index: int, row: int):
+        super().__init__(row=row, custom_id=button_custom_id(game_id, index))
         self.index = index
 
-    async def callback(self, interaction: Interaction):
-        view: XOGameView = self.view
-        await view.handle_move(interaction, self.index)
+# pending: สถานะใน journal ที่อ่านไว้ก่อน query DB (ดู load_games)
+def _view_from_state(bot, game_id: int, state, messages, pending=None):
+    if pending:
+        state["board"], state["turn"], state["moves"] = pending
+
+    opponent = None
+    if state["bot_difficulty"]:
+        bot_mark = 'X' if state["player_x"] == bot.user.id else 'O'
+        opponent = BotOpponent(bot_mark, state["bot_difficulty"])
+
+    view = XOGameView(
+        game_id=game_id,
+        player_x=state["player_x"],
+        player_o=state["player_o"],
+        board=state["board"],
+        turn=state["turn"],
+        start_time=state["start_time"],
+        opponent=opponent,
+        moves=state["moves"]
+    )
+    view.messages = [
+        bot.get_partial_messageable(channel_id, type=nextcord.ChannelType.private).get_partial_message(message_id)
+        for channel_id, message_id, spectator in messages
+        if not spectator
+    ]
+    view.spectators = [
+        spectator_message(bot, channel_id, message_id)
+        for channel_id, message_id, spectator in messages
+        if spectator
+    ]
+    return view
+
+# ข้อความของผู้ชมอยู่ในห้องของ guild (ไม่ใช่ DM)
+def spectator_message(bot, channel_id: int, message_id: int):
+    return bot.get_partial_messageable(channel_id, type=nextcord.ChannelType.text).get_partial_message(message_id)
+
+# 📥 หาเกมจาก registry หรือโหลดจาก DB (รวมตาที่ยังค้างใน journal) แล้วใส่ registry
+# คืน {game_id: view} เฉพาะเกมที่ยัง active
+async def load_games(bot, game_ids):
+    views = {game_id: live_games.get(game_id) for game_id in game_ids}
+    missing = [game_id for game_id, view in views.items() if view is None and game_id not in _finishing]
+    if missing:
+        # อ่าน journal ก่อน query: ถ้าอ่านหลัง flush ที่จบระหว่างรอ DB จะได้ทั้งแถวเก่าและ journal ว่าง
+        pending = {game_id: move_journal.pending(game_id) for game_id in missing}
+        states = await get_game_states(missing)
+        messages = await get_game_messages(missing)
+        for game_id, state in states.items():
+            if state["status"] != "active":
+                continue
+            # ระหว่างรอ DB อาจมีคนโหลดเกมนี้ไปแล้ว live_games.add จะคืนตัวเดิม
+            views[game_id] = live_games.add(
+                _view_from_state(bot, game_id, state, messages.get(game_id, []), pending[game_id])
+            )
+    return {game_id: view for game_id, view in views.items() if view is not None}
+
+async def load_game(bot, game_id: int):
+    view = live_games.get(game_id)
+    if view is not None:
+        return view
+    return (await load_games(bot, [game_id])).get(game_id)
@@ -0,0 +1,96 @@
+import aiohttp
+import asyncio
+import logging
+import os
+import signal
+import sys
+from db.database import setup_db, close_db
+from game.cluster import ClusterCoordinator, split_shards, CLUSTER_PORT
+from metrics import start_metrics_server
+from logsetup import setup_logging, stop_logging
+from dotenv import load_dotenv
+
+load_dotenv()
+TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+
+setup_logging("launcher.log")
+log = logging.getLogger("launcher")
+
+# จำนวน process (ค่าเริ่มต้น = จำนวน core) และจำนวน shard ทั้งหมด (ไม่ตั้ง = ถาม Discord)
+# ⚠️ worker ที่เพิ่มขึ้นช่วยกระจายเฉพาะงานของ gateway และ interaction ใน guild (แต่ละ process ถือ shard ของตัวเอง)
+# จำนวนเกมต่อวินาทีไม่เพิ่มตาม: การจับคู่ผ่านคิวกลางใน launcher นี้ที่เดียว และทุกเกม (ปุ่มใน DM) อยู่ที่ worker 0
+WORKERS = int(os.getenv("CLUSTER_WORKERS") or os.cpu_count() or 1)
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+# /metrics ของ launcher (คิวกลาง) อยู่ที่พอร์ตนี้ worker ที่ i อยู่ที่พอร์ต + 1 + i (ดู cogs/metrics.py)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+
+async def recommended_shards():
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {TOKEN}"}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+async def run_worker(cluster_id: int, shards: range, shard_count: int, stopping: asyncio.Event):
+    env = {
+        **os.environ,
+        "CLUSTER_ID": str(cluster_id),
+        "SHARD_IDS": f"{shards.start}-{shards.stop - 1}",
+        "SHARD_COUNT": str(shard_count),
+        "CLUSTER_PORT": str(CLUSTER_PORT),
+    }
+    delay = 1
+    # worker ที่ตายเองถูกเปิดใหม่ (รอนานขึ้นเรื่อยๆ ถ้าตายซ้ำ)
+    while not stopping.is_set():
+        log.info("🚀 Starting worker %s (shards %s-%s of %s)", cluster_id, shards.start, shards.stop - 1, shard_count,
+                 extra={"cluster_id": cluster_id})
+        process = await asyncio.create_subprocess_exec(sys.executable, BOT_SCRIPT, env=env)
+        waiter = asyncio.create_task(process.wait())
+        stopper = asyncio.create_task(stopping.wait())
+        await asyncio.wait((waiter, stopper), return_when=asyncio.FIRST_COMPLETED)
+        if stopping.is_set():
+            process.terminate()
+            await waiter
+            return
+        stopper.cancel()
+        log.error("❌ Worker %s exited with code %s, restarting in %ss", cluster_id, process.returncode, delay,
+                  extra={"cluster_id": cluster_id})
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60)
+
+async def main():
+    shard_count = int(SHARD_COUNT) if SHARD_COUNT else await recommended_shards()
+    ranges = split_shards(shard_count, WORKERS)
+
+    # migrate ครั้งเดียวก่อนเปิด worker แล้วถือคิวกลางไว้ที่ process นี้
+    await setup_db()
+    coordinator = ClusterCoordinator()
+    await coordinator.start()
+    log.info("🔗 Cluster coordinator on port %s: %s workers, %s shards", CLUSTER_PORT, len(ranges), shard_count)
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_PORT)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:
+            # Windows ไม่รองรับ add_signal_handler → ใช้ Ctrl+C (KeyboardInterrupt) แทน
+            pass
+
+    try:
+        await asyncio.gather(*(
+            run_worker(cluster_id, shards, shard_count, stopping)
+            for cluster_id, shards in enumerate(ranges)
+        ))
+    finally:
+        await coordinator.close()
+        await close_db()
+        stop_logging()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# ฟิลด์บริบทที่ส่งผ่าน extra={...} แล้วถูกเก็บลงบันทึก JSON
+CONTEXT_FIELDS = ("event", "game_id", "user_id", "opponent_id", "guild_id", "shard_id", "cluster_id", "message_id", "count", "seconds")
+
+# สัดส่วนที่เก็บของ event ที่เกิดถี่ (ระดับ WARNING ขึ้นไปเก็บเสมอ)
+DEFAULT_SAMPLE_RATES = {
+    "move": 0.01,
+    "xomatch": 0.1,
+    "queued": 0.1,
+}
+
+class JsonFormatter(logging.Formatter):
+    """
+    หนึ่งบรรทัดต่อหนึ่งบันทึก: เวลา ระดับ logger ข้อความ + ฟิลด์บริบท
+    """
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates=None, rng=None):
+        super().__init__()
+        self.rates = DEFAULT_SAMPLE_RATES if rates is None else rates
+        self.rng = rng or random.Random()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None))
+        return rate is None or self.rng.random() < rate
+
+class ContextFilter(logging.Filter):
+    """
+    เติมฟิลด์คงที่ของ process (เช่น cluster_id) ให้ทุกบันทึกที่ยังไม่มี
+    """
+
+    def __init__(self, **fields):
+        super().__init__()
+        self.fields = fields
+
+    def filter(self, record):
+        for key, value in self.fields.items():
+            if getattr(record, key, None) is None:
+                setattr(record, key, value)
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    ใส่บันทึกลงคิวแบบไม่รอ ถ้าคิวเต็ม (writer ตามไม่ทัน) ทิ้งแล้วนับไว้แทนการบล็อก event loop
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # แปลงข้อความตอนนี้เลย (args อาจถูกแก้ภายหลัง) แต่แยก traceback ไว้ให้ JsonFormatter
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener = None
+_queue_handler = None
+
+def setup_logging(path: str = "bot.log", level: int = logging.INFO, max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5, queue_size: int = 10_000, console: bool = True,
+                  sample_rates=None, **context):
+    """
+    ต่อ root logger เข้ากับคิว แล้วให้ thread เบื้องหลังเขียนลงไฟล์ JSON (หมุนไฟล์ตามขนาด) และ stdout
+    event loop ทำแค่สร้าง record แล้วใส่คิว ไม่แตะไฟล์หรือ stdout เอง
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_rates))
+    queue_handler.addFilter(ContextFilter(**context))
+
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        handlers.append(console_handler)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = queue_handler
+    return queue_handler
+
+# เขียนบันทึกที่ค้างในคิวให้หมดแล้วหยุด thread (เรียกตอนปิดบอท)
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+# จำนวนบันทึกที่ถูกทิ้งเพราะคิวเต็ม (export เป็น gauge ใน cogs/metrics.py)
+def dropped_records():
+    return _queue_handler.dropped if _queue_handler is not None else 0
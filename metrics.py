@@ -0,0 +1,182 @@
+import asyncio
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+
+# ขอบบนของแต่ละถัง (วินาที) ครอบคลุมตั้งแต่ query SQLite ไปจนถึง REST ที่ติด rate limit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class HistogramChild:
+    """
+    histogram ของ label ชุดเดียว: นับจำนวนต่อถัง ผลรวม และจำนวนทั้งหมด (observe เป็น O(log ถัง))
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def quantile(self, q: float):
+        """
+        ประมาณ quantile จากถัง (เทียบเชิงเส้นภายในถัง แบบเดียวกับ histogram_quantile ของ Prometheus)
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children = {}
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value: float, **labels):
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        return self.labels(**labels).time()
+
+    def children(self):
+        return [(dict(zip(self.labelnames, key)), child) for key, child in sorted(self._children.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, child in self.children():
+            base = ",".join(f'{name}="{value}"' for name, value in labels.items())
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), child.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {child.sum}")
+            lines.append(f"{self.name}_count{suffix} {child.count}")
+        return lines
+
+class Gauge:
+    """
+    ค่าที่อ่านสดตอน export จาก callback (เช่น จำนวนเกมใน registry)
+    """
+
+    def __init__(self, name: str, help_text: str, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, help_text, labelnames, buckets)
+        return self._metrics[name]
+
+    def gauge(self, name: str, help_text: str, read):
+        self._metrics[name] = Gauge(name, help_text, read)
+        return self._metrics[name]
+
+    def histograms(self):
+        return [metric for metric in self._metrics.values() if isinstance(metric, Histogram)]
+
+    def render(self):
+        """
+        ข้อความรูปแบบ Prometheus text exposition 0.0.4
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# 📈 registry เดียวของทั้ง process
+metrics = MetricsRegistry()
+
+DB_LATENCY = metrics.histogram("xo_db_query_seconds", "Latency of db.database helpers", ["helper"])
+MOVE_LATENCY = metrics.histogram("xo_handle_move_seconds", "XOGameView.handle_move end to end, including fan-out", ["outcome"])
+LOCK_WAIT = metrics.histogram("xo_game_lock_wait_seconds", "Time spent waiting for XOGameView.lock")
+REST_EDIT = metrics.histogram("xo_discord_edit_seconds", "Discord REST message edits", ["kind"])
+QUEUE_WAIT = metrics.histogram(
+    "xo_queue_wait_seconds", "Time a player waited in the matchmaking queue before being paired",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600)
+)
+TIMEOUT_SWEEP = metrics.histogram("xo_timeout_sweep_seconds", "Duration of one timeout expiry batch")
+
+def timed(histogram: Histogram, **labels):
+    """
+    decorator จับเวลา coroutine function ลง histogram
+    """
+    def decorator(func):
+        child = histogram.labels(**labels)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+# 🌐 HTTP server เล็กๆ ให้ Prometheus มาดึง /metrics (ผูกกับ localhost)
+async def _serve_metrics(reader, writer):
+    try:
+        request = await reader.readline()
+        # อ่าน header ทิ้งจนถึงบรรทัดว่าง
+        while (await reader.readline()).strip():
+            pass
+        if request.split(b" ")[1:2] == [b"/metrics"]:
+            status, body = "200 OK", metrics.render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    return await asyncio.start_server(_serve_metrics, host, port)